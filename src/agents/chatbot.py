@@ -1,29 +1,49 @@
-from langchain_core.messages import BaseMessage
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, BaseMessage
 from langchain_core.runnables import RunnableConfig
-from langgraph.checkpoint.memory import MemorySaver
 from langgraph.func import entrypoint
 
+from agents.checkpointer import checkpointer
+from agents.memory import build_prompt
+from backend.api.service.utils import convert_message_content_to_string
 from core import get_model, settings
+from core.cache import ResponseCache
+from logs import tracing
 from logs.logger_factory import get_logger
 import traceback
 
 logger = get_logger("chatbot-agent", 'chatbot-agent.log')
 
-@entrypoint(checkpointer=MemorySaver())
+response_cache = (
+    ResponseCache(max_entries=settings.CHAT_CACHE_MAX_ENTRIES, ttl_seconds=settings.CHAT_CACHE_TTL_SECONDS)
+    if settings.CHAT_CACHE_ENABLED
+    else None
+)
+
+
+def _response_cache_key(model_name: str, model, messages: list[BaseMessage]) -> str:
+    params = getattr(model, "_identifying_params", {})
+    turns = [(m.type, convert_message_content_to_string(m.content)) for m in messages]
+    return ResponseCache.make_key(str(model_name), params, turns)
+
+@entrypoint(checkpointer=checkpointer)
 async def chatbot(
     inputs: dict[str, list[BaseMessage]],
     *,
-    previous: dict[str, list[BaseMessage]],
+    previous: dict,
     config: RunnableConfig,
 ):
     try:
         messages = inputs["messages"]
+        summary, summarized_count = "", 0
         if previous:
             messages = previous["messages"] + messages
+            summary = previous.get("summary", "")
+            summarized_count = previous.get("summarized_count", 0)
 
         model_name = config["configurable"].get("model", settings.DEFAULT_MODEL)
-        logger.debug(f"🧠 Requested model: {model_name}")
-        logger.debug(f"📦 Full config received: {config}")
+        logger.debug("🧠 Requested model: %s", model_name)
+        logger.debug("📦 Full config received: %s", config)
 
         model = get_model(model_name)
 
@@ -31,11 +51,44 @@ async def chatbot(
             logger.error(f"❌ get_model() returned None for model: {model_name}")
             raise ValueError(f"Invalid or unsupported model: {model_name}")
 
-        response = await model.ainvoke(messages)
+        # Opt-in exact-match cache; a request can bypass it with agent_config={"cache": False}.
+        # Keyed on the raw conversation, so a hit is served before any summarization call.
+        cache_key = cached = None
+        if response_cache is not None and config["configurable"].get("cache", True):
+            cache_key = _response_cache_key(model_name, model, messages)
+            cached = response_cache.get(cache_key)
+
+        if cached is not None:
+            logger.debug("⚡ Response cache hit")
+            # Replay through a chat model so stream_mode="messages" still yields tokens.
+            model = GenericFakeChatModel(messages=iter([AIMessage(content=cached)]))
+            prompt = messages  # ignored by the replay model
+        else:
+            with tracing.span("chatbot.build_prompt"):
+                prompt, summary, summarized_count = await build_prompt(
+                    model,
+                    messages,
+                    summary,
+                    summarized_count,
+                    budget=settings.CHAT_MEMORY_TOKEN_BUDGET,
+                    summary_max_words=settings.CHAT_SUMMARY_MAX_WORDS,
+                    low_water=settings.CHAT_SUMMARY_LOW_WATER,
+                )
+            logger.debug("🧾 Prompt: %d of %d messages, %d summarized", len(prompt), len(messages), summarized_count)
+
+        with tracing.span("chatbot.llm", cached=cached is not None):
+            response = await model.ainvoke(prompt)
+
+        if cache_key is not None and cached is None:
+            response_cache.put(cache_key, convert_message_content_to_string(response.content))
 
         return entrypoint.final(
             value={"messages": [response]},
-            save={"messages": messages + [response]},
+            save={
+                "messages": messages + [response],
+                "summary": summary,
+                "summarized_count": summarized_count,
+            },
         )
 
     except Exception as e:
@@ -0,0 +1,251 @@
+import asyncio
+import random
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Sequence
+from typing import Any
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    copy_checkpoint,
+)
+from langgraph.checkpoint.memory import MemorySaver
+
+from core import settings
+from logs.logger_factory import get_logger
+
+logger = get_logger("checkpointer", "checkpointer.log")
+
+
+def _postgres_conninfo() -> str:
+    password = settings.POSTGRES_PASSWORD.get_secret_value() if settings.POSTGRES_PASSWORD else ""
+    return (
+        f"postgresql://{settings.POSTGRES_USER}:{password}@{settings.POSTGRES_HOST}:"
+        f"{settings.POSTGRES_PORT or 5432}/{settings.POSTGRES_DB}"
+    )
+
+
+class BoundedCheckpointer(BaseCheckpointSaver):
+    """
+    Checkpointer that stores agent threads in SQLite or Postgres and keeps only
+    recently active threads in memory.
+
+    The storage saver is created on first use (or by `open`). Postgres goes
+    through a psycopg connection pool; SQLite uses one aiosqlite connection,
+    which serializes access. The latest checkpoint of up to `max_threads`
+    threads is kept in an LRU cache, so a follow-up turn does not read it back
+    from the database. Threads idle for longer than `idle_seconds` are dropped
+    from the cache. With the "memory" backend nothing is persisted, and evicted
+    threads are deleted instead so process memory stays bounded.
+    """
+
+    def __init__(
+        self,
+        backend: str = "sqlite",
+        sqlite_path: str = "checkpoints.sqlite",
+        pool_min_size: int = 1,
+        pool_max_size: int = 10,
+        max_threads: int = 256,
+        idle_seconds: float = 900.0,
+    ):
+        super().__init__()
+        self.backend = backend
+        self.sqlite_path = sqlite_path
+        self.pool_min_size = pool_min_size
+        self.pool_max_size = pool_max_size
+        self.max_threads = max_threads
+        self.idle_seconds = idle_seconds
+        self._saver: BaseCheckpointSaver | None = None
+        self._resource: Any = None  # connection pool or connection owned by the saver
+        self._open_lock: asyncio.Lock | None = None
+        self._hot: OrderedDict[tuple[str, str], tuple[float, CheckpointTuple]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __str__(self):
+        return f"BoundedCheckpointer(backend={self.backend})"
+
+    async def open(self) -> BaseCheckpointSaver:
+        if self._saver is not None:
+            return self._saver
+        if self._open_lock is None:
+            self._open_lock = asyncio.Lock()
+        async with self._open_lock:
+            if self._saver is None:
+                self._saver = await self._create_saver()
+                logger.info(f"✅ Checkpointer ready: {self.backend}")
+        return self._saver
+
+    async def _create_saver(self) -> BaseCheckpointSaver:
+        if self.backend == "memory":
+            return MemorySaver()
+
+        if self.backend == "sqlite":
+            try:
+                import aiosqlite
+                from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+            except ImportError:
+                raise RuntimeError("SQLite checkpointer requires `pip install langgraph-checkpoint-sqlite`.")
+            self._resource = await aiosqlite.connect(self.sqlite_path)
+            await self._resource.execute("PRAGMA journal_mode=WAL")
+            saver = AsyncSqliteSaver(self._resource)
+
+        elif self.backend == "postgres":
+            try:
+                from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+                from psycopg.rows import dict_row
+                from psycopg_pool import AsyncConnectionPool
+            except ImportError:
+                raise RuntimeError(
+                    "Postgres checkpointer requires `pip install langgraph-checkpoint-postgres psycopg[pool]`."
+                )
+            self._resource = AsyncConnectionPool(
+                _postgres_conninfo(),
+                min_size=self.pool_min_size,
+                max_size=self.pool_max_size,
+                kwargs={"autocommit": True, "prepare_threshold": 0, "row_factory": dict_row},
+                open=False,
+            )
+            await self._resource.open()
+            saver = AsyncPostgresSaver(self._resource)
+
+        else:
+            raise ValueError(f"Unsupported checkpointer backend: {self.backend}")
+
+        await saver.setup()
+        return saver
+
+    async def close(self) -> None:
+        if self._resource is not None:
+            await self._resource.close()
+            self._resource = None
+        self._saver = None
+        self._hot.clear()
+        logger.info("✅ Checkpointer closed.")
+
+    # ---- hot cache ----
+
+    @staticmethod
+    def _thread_key(config: RunnableConfig) -> tuple[str, str]:
+        configurable = config["configurable"]
+        return str(configurable["thread_id"]), configurable.get("checkpoint_ns", "")
+
+    async def _evict(self) -> None:
+        now = time.monotonic()
+        evicted = []
+        while self._hot:
+            key, (last_used, _) = next(iter(self._hot.items()))
+            if len(self._hot) <= self.max_threads and now - last_used < self.idle_seconds:
+                break
+            self._hot.popitem(last=False)
+            evicted.append(key[0])
+        if evicted and self.backend == "memory":
+            for thread_id in set(evicted):
+                await self._saver.adelete_thread(thread_id)
+        if evicted:
+            logger.debug(f"♻️ Evicted {len(evicted)} idle threads from the checkpoint cache")
+
+    def _remember(self, key: tuple[str, str], checkpoint_tuple: CheckpointTuple) -> None:
+        self._hot[key] = (time.monotonic(), checkpoint_tuple)
+        self._hot.move_to_end(key)
+
+    def stats(self) -> dict:
+        return {"backend": self.backend, "cached_threads": len(self._hot), "hits": self.hits, "misses": self.misses}
+
+    # ---- BaseCheckpointSaver ----
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        saver = await self.open()
+        key = self._thread_key(config)
+        latest = not config["configurable"].get("checkpoint_id")
+        if latest and key in self._hot:
+            self.hits += 1
+            _, checkpoint_tuple = self._hot[key]
+            self._remember(key, checkpoint_tuple)
+            return checkpoint_tuple._replace(checkpoint=copy_checkpoint(checkpoint_tuple.checkpoint))
+
+        checkpoint_tuple = await saver.aget_tuple(config)
+        if latest:
+            self.misses += 1
+            if checkpoint_tuple is not None:
+                self._remember(key, checkpoint_tuple)
+                await self._evict()
+        return checkpoint_tuple
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        saver = await self.open()
+        async for checkpoint_tuple in saver.alist(config, filter=filter, before=before, limit=limit):
+            yield checkpoint_tuple
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        saver = await self.open()
+        next_config = await saver.aput(config, checkpoint, metadata, new_versions)
+        parent_config = config if config["configurable"].get("checkpoint_id") else None
+        self._remember(
+            self._thread_key(config),
+            CheckpointTuple(
+                config=next_config,
+                checkpoint=copy_checkpoint(checkpoint),
+                metadata=metadata,
+                parent_config=parent_config,
+                pending_writes=[],
+            ),
+        )
+        await self._evict()
+        return next_config
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        saver = await self.open()
+        await saver.aput_writes(config, writes, task_id, task_path)
+        # Pending writes belong to the cached checkpoint; re-read it on next access.
+        self._hot.pop(self._thread_key(config), None)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        saver = await self.open()
+        await saver.adelete_thread(thread_id)
+        for key in [key for key in self._hot if key[0] == str(thread_id)]:
+            del self._hot[key]
+
+    def get_next_version(self, current: str | None, channel: None) -> str:
+        # Same version format as the SQLite, Postgres and in-memory savers.
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+
+checkpointer = BoundedCheckpointer(
+    backend=settings.CHECKPOINTER_BACKEND,
+    sqlite_path=settings.CHECKPOINTER_SQLITE_PATH,
+    pool_min_size=settings.CHECKPOINTER_POOL_MIN_SIZE,
+    pool_max_size=settings.CHECKPOINTER_POOL_MAX_SIZE,
+    max_threads=settings.CHECKPOINT_CACHE_MAX_THREADS,
+    idle_seconds=settings.CHECKPOINT_CACHE_IDLE_SECONDS,
+)
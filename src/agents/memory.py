@@ -0,0 +1,115 @@
+from functools import lru_cache
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from langgraph.constants import TAG_NOSTREAM
+
+from backend.api.service.utils import convert_message_content_to_string
+from logs.logger_factory import get_logger
+
+logger = get_logger("chatbot-memory", "chatbot-agent.log")
+
+try:
+    import tiktoken
+
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:  # optional: fall back to a ~4 chars/token estimate
+    _ENCODING = None
+
+# Role markers and separators the chat template adds around every message.
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_PROMPT = (
+    "You maintain a running summary of a conversation between a user and an assistant.\n"
+    "Current summary:\n{summary}\n\n"
+    "New messages:\n{messages}\n\n"
+    "Rewrite the summary so it also covers the new messages. Keep names, facts, "
+    "decisions and open requests; drop small talk. Answer with the summary only, "
+    "in at most {max_words} words."
+)
+
+
+@lru_cache(maxsize=8192)
+def _count_text_tokens(text: str) -> int:
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    return max(1, len(text) // 4)
+
+
+def count_tokens(message: BaseMessage) -> int:
+    """Approximate prompt tokens of one message; counts are cached by content."""
+    return _count_text_tokens(convert_message_content_to_string(message.content)) + MESSAGE_OVERHEAD_TOKENS
+
+
+def split_recent(messages: list[BaseMessage], budget: int) -> int:
+    """
+    Find where the recent window starts.
+    :param messages: Full conversation, oldest first.
+    :param budget: Token budget for the recent window.
+    :return: Index of the first message kept verbatim. The newest message is always kept.
+    """
+    used = 0
+    for i in range(len(messages) - 1, -1, -1):
+        used += count_tokens(messages[i])
+        if used > budget and i < len(messages) - 1:
+            return i + 1
+    return 0
+
+
+async def summarize(
+    model: BaseChatModel, summary: str, messages: list[BaseMessage], max_words: int = 150
+) -> str:
+    """Fold `messages` into the running `summary` with one LLM call."""
+    transcript = "\n".join(
+        f"{message.type}: {convert_message_content_to_string(message.content)}" for message in messages
+    )
+    prompt = SUMMARY_PROMPT.format(summary=summary or "(empty)", messages=transcript, max_words=max_words)
+    # The messages stream mode skips calls tagged nostream, so summary tokens never reach the client
+    response = await model.with_config(tags=[TAG_NOSTREAM]).ainvoke([HumanMessage(content=prompt)])
+    return convert_message_content_to_string(response.content).strip()
+
+
+def summary_reserve(max_words: int) -> int:
+    """Tokens to set aside for a summary of at most `max_words` words (~4 tokens per 3 words)."""
+    return max_words * 4 // 3 + MESSAGE_OVERHEAD_TOKENS
+
+
+async def build_prompt(
+    model: BaseChatModel,
+    messages: list[BaseMessage],
+    summary: str,
+    summarized_count: int,
+    budget: int,
+    summary_max_words: int = 150,
+    low_water: float = 0.5,
+) -> tuple[list[BaseMessage], str, int]:
+    """
+    Bound the prompt for a conversation turn.
+
+    Every message not covered by the running summary is sent verbatim, after
+    the summary. While that fits in `budget`, nothing is summarized. Once it
+    does not, the oldest unsummarized messages are folded into the summary
+    until the verbatim part is down to `low_water` of the budget left after
+    reserving room for the summary. The slice sent to the LLM is exactly the
+    slice dropped from the prompt, and the headroom this leaves means the next
+    turns need no extra LLM call.
+    :param messages: Full conversation, oldest first, ending with the new input.
+    :param summary: Running summary from the checkpoint.
+    :param summarized_count: How many leading messages the summary already covers.
+    :param low_water: Fraction of the recent-window budget kept after summarizing.
+    :return: (prompt messages, updated summary, updated summarized_count)
+    """
+    summary_tokens = _count_text_tokens(summary) + MESSAGE_OVERHEAD_TOKENS if summary else 0
+    start = split_recent(messages, budget - summary_tokens)
+
+    if start > summarized_count:
+        window = budget - max(summary_tokens, summary_reserve(summary_max_words))
+        cut = max(start, split_recent(messages, int(window * low_water)))
+        logger.debug("🧾 Summarizing messages %d..%d", summarized_count, cut)
+        summary = await summarize(model, summary, messages[summarized_count:cut], summary_max_words)
+        summarized_count = cut
+
+    prompt = list(messages[summarized_count:])
+    if summary:
+        prompt.insert(0, SystemMessage(content=f"Summary of the earlier conversation:\n{summary}"))
+    return prompt, summary, summarized_count
@@ -1,22 +1,28 @@
 from uuid import uuid4
-import inspect
-import json
 
 from fastapi import FastAPI, HTTPException
 from fastapi.responses import StreamingResponse
-from contextlib import asynccontextmanager
+from contextlib import aclosing, asynccontextmanager
 from fastapi import FastAPI, APIRouter, Request
 from dotenv import load_dotenv
 from collections.abc import AsyncGenerator
 
-from schema.base import UserInput, StreamInput
+from schema.base import UserInput, StreamInput, ChatHistoryInput, ChatHistory
 from langgraph.pregel import Pregel
 from langgraph.types import Command, Interrupt
 from langchain_core.runnables import RunnableConfig
 from langchain_core.messages import AIMessage, AIMessageChunk, AnyMessage, HumanMessage, ToolMessage
 from typing import Any
 from agents.agent import get_agent, get_all_agent_info, DEFAULT_AGENT
-from backend.api.service.utils import langchain_to_chat_message
+from agents.checkpointer import checkpointer
+from agents.chatbot import response_cache
+from backend.api.service.sse import encode_stream
+from backend.api.service.utils import convert_message_content_to_string, langchain_to_chat_message
+from core import settings
+from core.llm import close_upstream_pools, http_pool_stats, upstream_stats
+from core.metrics import CHAT_TOKENS, CHAT_TOKENS_PER_SECOND, CHAT_TTFT_SECONDS
+import time
+from logs import tracing
 from logs.logger_factory import get_logger
 import traceback
 
@@ -34,9 +40,13 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
             agent = get_agent(info.key)
             app.state.agent_pool[info.key] = agent
             print(f"✅ Preloaded {len(app.state.agent_pool)} agents.")
+        await checkpointer.open()
+        app.state.checkpointer = checkpointer
 
         yield
         app.state.agent_pool.clear()
+        await checkpointer.close()
+        await close_upstream_pools()
         print("✅ Cleared agent pool.")
     except Exception as e:
         logger.exception("🔥 Error during lifespan setup")
@@ -50,6 +60,8 @@ async def _handle_input(user_input: UserInput, agent: Pregel):
     """
     run_id = uuid4()
     thread_id = user_input.thread_id
+    tracing.set_attribute("run_id", str(run_id))
+    tracing.set_attribute("thread_id", thread_id)
 
     configurable = {
         "model": user_input.model,
@@ -69,7 +81,8 @@ async def _handle_input(user_input: UserInput, agent: Pregel):
         configurable=configurable,
     )
 
-    state = await agent.aget_state(config=config)
+    with tracing.span("chat.get_state"):
+        state = await agent.aget_state(config=config)
     interrupted_tasks = [
         task for task in state.tasks if hasattr(task, "interrupts") and task.interrupts
     ]
@@ -100,17 +113,17 @@ async def invoke(request: Request, user_input: UserInput, agent_key: str = DEFAU
 
     kwargs, run_id = await _handle_input(user_input, agent)
     try:
-        response_events: list[tuple[str, Any]] = await agent.ainvoke(**kwargs, stream_mode=["updates", "values"])  # type: ignore # fmt: skip
-        logger.info(f"✅ Agent returned events: {[event[0] for event in response_events]}")
-        logger.info(f"🔍 Last event: {response_events[-1]}")
+        with tracing.span("agent.run"):
+            response_events: list[tuple[str, Any]] = await agent.ainvoke(**kwargs, stream_mode=["updates", "values"])  # type: ignore # fmt: skip
+        logger.info("✅ Agent returned events: %s", [event[0] for event in response_events])
+        logger.debug("🔍 Last event: %s", response_events[-1])
 
         response_type, response = response_events[-1]
-        logger.info(f"🧠 messages = {response['messages']}")
         
         if response_type == "values":
             # Normal response, the agent completed successfully
             try:
-              logger.debug(f"🧪 messages: {response['messages']}")
+              logger.debug("🧪 messages: %s", response["messages"])
               output = langchain_to_chat_message(response["messages"][-1])
 
             except Exception as e:
@@ -136,10 +149,11 @@ async def invoke(request: Request, user_input: UserInput, agent_key: str = DEFAU
         raise HTTPException(status_code=500, detail="Unexpected error")
 
 
+_AI_MESSAGE_FIELDS = frozenset(AIMessage.model_fields) | {"content"}
+
+
 def _create_ai_message(parts: dict) -> AIMessage:
-    sig = inspect.signature(AIMessage)
-    valid_keys = set(sig.parameters)
-    filtered = {k: v for k, v in parts.items() if k in valid_keys}
+    filtered = {k: v for k, v in parts.items() if k in _AI_MESSAGE_FIELDS}
     # Ensure 'content' is always present
     if "content" not in filtered:
         logger.error("❌ AIMessage must have 'content' field")
@@ -150,25 +164,23 @@ def _create_ai_message(parts: dict) -> AIMessage:
     return AIMessage(**filtered)
 
 
-async def message_generator(request: Request,
+async def _agent_events(request: Request,
     user_input: StreamInput, agent_key: str = DEFAULT_AGENT
-) -> AsyncGenerator[str, None]:
+) -> AsyncGenerator[tuple[str, Any], None]:
     """
-    Generate a stream of messages from the agent.
-
-    This is the workhorse method for the /stream endpoint.
+    Run the agent and yield ("message" | "token" | "error", content) events.
     """
     agent_pool = request.app.state.agent_pool
     agent: Pregel = agent_pool.get(agent_key)
 
     kwargs, run_id = await _handle_input(user_input, agent)
 
+    # The span is recorded, not opened, so it covers the run even when the generator is closed early
+    agent_started = time.perf_counter()
+    stream = agent.astream(**kwargs, stream_mode=["updates", "messages"])
     try:
         # Process streamed events from the graph and yield messages over the SSE stream.
-        async for stream_event in agent.astream(
-            **kwargs, stream_mode=["updates", "messages"]
-        ):
-            logger.info(f"🔂 stream_event = {stream_event}")
+        async for stream_event in stream:
             if not isinstance(stream_event, tuple):
                 continue
             stream_mode, event = stream_event
@@ -182,7 +194,7 @@ async def message_generator(request: Request,
                         interrupt: Interrupt
                         for interrupt in updates:
                             new_messages.append(AIMessage(content=interrupt.value))
-                            logger.info(f"⚠️ Interrupt message: {msg.content[:80]}")
+                            logger.info(f"⚠️ Interrupt message: {str(interrupt.value)[:80]}")
                         continue
 
                     updates = updates or {}
@@ -210,55 +222,144 @@ async def message_generator(request: Request,
             
             for msg in processed_messages:
                 try:
-                    logger.info(f"🔎 Converting msg to chat: {msg}")
                     chat_message = langchain_to_chat_message(msg)
-
                     chat_message.run_id = str(run_id)
-
-                    logger.info(f"🟢 Yielding chat message: {chat_message.content[:100]}")
-                    yield f"data: {json.dumps({'type': 'message', 'content': chat_message.dict()})}\n\n"
-
                 except Exception as e:
                     logger.exception("💥 Error converting message to ChatMessage")
-                    yield f"data: {json.dumps({'type': 'error', 'content': 'Internal server error'})}\n\n"
+                    yield "error", "Internal server error"
                     continue
 
-                yield f"data: {json.dumps({'type': 'message', 'content': chat_message.model_dump()})}\n\n"
+                yield "message", chat_message.model_dump()
 
             if stream_mode == "messages":
-                logger.info(f"🔁 stream_mode={stream_mode}, event={event}")
                 if not user_input.stream_tokens:
                     continue
 
                 msg, metadata = event
                 if not isinstance(msg, AIMessageChunk):
-                    logger.warning("⚠️ Skipped non-AIMessageChunk in stream_mode=messages")
-                    continue
-
-                # Convert the message to a standard AIMessage
-                ai_message = _create_ai_message(msg.dict())
-
-                ai_message.run_id = str(run_id)
-                ai_message.metadata = metadata
-                
-                logger.info(f"🟢 Yielding token chunk: {ai_message.content[:50]}")
-                token = ai_message.content
-
-                if token.strip() == "":
-                    logger.warning("⚠️ Skipped empty token chunk")
                     continue
 
-                logger.info(f"🟢 Yielding token chunk: {token[:50]}")
-                yield f"data: {json.dumps({'type': 'token', 'content': token})}\n\n"
+                token = convert_message_content_to_string(msg.content)
+                if token:
+                    yield "token", token
                 
     except Exception as e:
         tb = traceback.format_exc()
         logger.error(f"🔥 Error in message_generator: {e}")
         logger.error(tb)
         
-        yield f"data: {json.dumps({'type': 'error', 'content': 'Internal server error'})}\n\n"
+        yield "error", "Internal server error"
     finally:
-        yield "data: [DONE]\n\n"
+        # Shuts the graph run (and its upstream LLM response) down now, not at garbage collection
+        await stream.aclose()
+        tracing.record("agent.run", agent_started, time.perf_counter())
+
+
+async def _measure_tokens(
+    events: AsyncGenerator[tuple[str, Any], None]
+) -> AsyncGenerator[tuple[str, Any], None]:
+    """Pass events through, recording time-to-first-token and token rate."""
+    started = time.perf_counter()
+    first_at = last_at = None
+    tokens = 0
+    async with aclosing(events):
+        async for event in events:
+            if event[0] == "token":
+                last_at = time.perf_counter()
+                if first_at is None:
+                    first_at = last_at
+                    CHAT_TTFT_SECONDS.observe(first_at - started)
+                    tracing.record("llm.first_token", started, first_at)
+                tokens += 1
+            yield event
+    if tokens:
+        CHAT_TOKENS.inc(tokens)
+        if tokens > 1 and last_at > first_at:
+            CHAT_TOKENS_PER_SECOND.observe((tokens - 1) / (last_at - first_at))
+
+
+async def message_generator(request: Request,
+    user_input: StreamInput, agent_key: str = DEFAULT_AGENT
+) -> AsyncGenerator[str, None]:
+    """
+    Generate a stream of messages from the agent.
+
+    This is the workhorse method for the /stream endpoint. Tokens are
+    coalesced into frames of up to SSE_FLUSH_MS / SSE_FLUSH_BYTES.
+    """
+    async for frame in encode_stream(
+        _measure_tokens(_agent_events(request, user_input, agent_key)),
+        flush_ms=settings.SSE_FLUSH_MS,
+        max_bytes=settings.SSE_FLUSH_BYTES,
+    ):
+        yield frame
+
+
+@router.get("/stats")
+async def stats() -> dict:
+    """Checkpointer hot-cache and response-cache counters."""
+    return {
+        "checkpointer": checkpointer.stats(),
+        "response_cache": response_cache.stats.snapshot() if response_cache is not None else None,
+    }
+
+
+@router.get("/upstreams")
+async def upstreams() -> dict:
+    """Per-upstream load, latency and error counters of local LLM pools."""
+    return upstream_stats()
+
+
+@router.get("/http")
+async def http_pools() -> dict:
+    """Requests vs. connections opened per LLM host, from the shared keep-alive pools."""
+    return http_pool_stats()
+
+
+@router.delete("/cache")
+async def clear_response_cache() -> dict:
+    removed = response_cache.clear() if response_cache is not None else 0
+    return {"removed": removed}
+
+
+@router.post("/history")
+async def history(request: Request, history_input: ChatHistoryInput, agent_key: str = DEFAULT_AGENT) -> ChatHistory:
+    """
+    Return one page of a thread's messages, read directly from the agent checkpointer.
+
+    Pages go from the latest messages backwards: the first request returns the
+    last `limit` messages, and `next_cursor` fetches the ones before them.
+    Messages within a page are in chronological order. Cursors are message
+    offsets, which stay valid because a thread's history only grows at the end.
+
+    Only the response is bounded, not the read. Threads in the checkpointer's
+    hot cache are served from memory. For any other thread, the latest
+    checkpoint is loaded and deserialized in full, including every saved
+    message, and then sliced here. The cost of reopening a cold thread
+    therefore grows with the length of its history.
+    """
+    agent: Pregel = request.app.state.agent_pool.get(agent_key)
+    if agent is None:
+        raise HTTPException(status_code=404, detail=f"Agent '{agent_key}' not found.")
+
+    checkpoint_tuple = await agent.checkpointer.aget_tuple({"configurable": {"thread_id": history_input.thread_id}})
+    if checkpoint_tuple is None:
+        raise HTTPException(status_code=404, detail=f"Thread '{history_input.thread_id}' not found.")
+
+    # Functional-API agents keep the value passed to `entrypoint.final(save=...)` in this channel.
+    saved = checkpoint_tuple.checkpoint["channel_values"].get("__previous__") or {}
+    messages = saved.get("messages", [])
+
+    end = len(messages) if history_input.cursor is None else min(history_input.cursor, len(messages))
+    start = max(end - history_input.limit, 0)
+    try:
+        page = [langchain_to_chat_message(m) for m in messages[start:end]]
+    except Exception:
+        logger.exception("💥 Error converting history to chat messages")
+        raise HTTPException(status_code=500, detail="Error in message conversion")
+
+    logger.info(f"📜 History thread_id={history_input.thread_id}: messages {start}..{end} of {len(messages)}")
+    return ChatHistory(messages=page, next_cursor=start or None)
 
 
 @router.post("/stream", response_class=StreamingResponse)
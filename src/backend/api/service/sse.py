@@ -0,0 +1,128 @@
+import asyncio
+import json
+import time
+from collections.abc import AsyncIterator
+from typing import Any
+
+from logs import tracing
+from logs.logger_factory import get_logger
+
+logger = get_logger("sse", "chat.log")
+
+try:
+    import orjson
+
+    def dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:  # optional: stdlib json with compact separators
+    def dumps(obj: Any) -> str:
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+SSE_DONE = "data: [DONE]\n\n"
+
+
+def sse_event(event_type: str, content: Any) -> str:
+    """Encode one `{"type", "content"}` server-sent event."""
+    return f"data: {dumps({'type': event_type, 'content': content})}\n\n"
+
+
+async def encode_stream(
+    events: AsyncIterator[tuple[str, Any]],
+    flush_ms: float = 30.0,
+    max_bytes: int = 512,
+) -> AsyncIterator[str]:
+    """
+    Turn (type, content) events into SSE frames, coalescing consecutive tokens.
+
+    Tokens are buffered and sent as one "token" frame when `flush_ms` has
+    passed since the first buffered token, when the buffer reaches
+    `max_bytes`, before any other event, and at the end of the stream. The
+    time window is enforced even while the source is idle. Whitespace-only
+    buffers are held back until visible text follows, so every token frame
+    but possibly the last carries visible text. The stream always ends with
+    [DONE].
+
+    The source is drained by a single producer task into a queue, and is
+    closed as soon as the stream ends or its client disconnects.
+    :param events: ("token", str) pairs, or ("message" | "error", payload) pairs.
+    """
+    buffer: list[str] = []
+    buffered_bytes = 0
+    first_at = 0.0
+    tokens = frames = 0
+    encode_s = 0.0
+
+    def take(force: bool = False) -> str | None:
+        nonlocal buffer, buffered_bytes, frames, encode_s
+        text = "".join(buffer)
+        if not text or not (force or text.strip()):
+            return None
+        buffer, buffered_bytes = [], 0
+        frames += 1
+        started = time.perf_counter()
+        frame = sse_event("token", text)
+        encode_s += time.perf_counter() - started
+        return frame
+
+    queue: asyncio.Queue = asyncio.Queue()
+    end = object()
+
+    async def produce() -> None:
+        try:
+            async for event in events:
+                queue.put_nowait(event)
+        finally:
+            queue.put_nowait(end)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            if not buffer or not queue.empty():
+                item = await queue.get()
+            else:
+                timeout = max(first_at + flush_ms / 1000 - time.perf_counter(), 0)
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    if (frame := take()) is not None:
+                        yield frame
+                    else:
+                        first_at = time.perf_counter()
+                    continue
+
+            if item is end:
+                # Surfaces an exception raised by the source
+                await producer
+                break
+
+            event_type, content = item
+            if event_type == "token":
+                if not buffer:
+                    first_at = time.perf_counter()
+                buffer.append(content)
+                buffered_bytes += len(content)
+                tokens += 1
+                if buffered_bytes >= max_bytes and (frame := take()) is not None:
+                    yield frame
+                continue
+
+            # A whitespace-only buffer stays and is carried into the next token frame
+            if (frame := take()) is not None:
+                yield frame
+            frames += 1
+            yield sse_event(event_type, content)
+
+        if (frame := take(force=True)) is not None:
+            yield frame
+        yield SSE_DONE
+    finally:
+        if not producer.done():
+            producer.cancel()
+            await asyncio.wait({producer})
+        if hasattr(events, "aclose"):
+            await events.aclose()
+        # Total serialization time of the token frames, as one span
+        now = time.perf_counter()
+        tracing.record("sse.encode", now - encode_s, now, tokens=tokens, frames=frames)
+        logger.debug("📦 SSE stream: %d tokens in %d frames", tokens, frames)
@@ -1,8 +1,23 @@
-from fastapi import Request, UploadFile, File, APIRouter, FastAPI, HTTPException
-from fastapi.responses import JSONResponse
-from schema.base import SpeechRequest, TextRequest
-from schema.models import SpeechModel, TextModel
-from contextlib import asynccontextmanager
+from fastapi import Request, UploadFile, File, APIRouter, FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, StreamingResponse
+from schema.audio import SAMPLE_RATE, decode_audio, pcm16_to_float32
+from schema.base import SpeechRequest, TextBatchRequest, TextRequest
+from schema.models import OnnxTextModel, SpeechModel, TextModel
+from core import settings
+from core.batching import SpeechBatcher, TranslationBatcher
+from core.cache import TranslationCache
+from core.executor import ExecutorOverloaded, InferenceExecutor
+from core.registry import ModelRegistry
+from core.segmentation import split_document
+from core.longform import iter_audio_windows, transcribe_windows
+from core.metrics import AUDIO_SECONDS
+from core.vad import SpeechSegment, VoiceActivitySegmenter
+import asyncio
+import json
+import threading
+import time
+from contextlib import AbstractAsyncContextManager, AsyncExitStack, asynccontextmanager
+from collections import deque
 from collections.abc import AsyncGenerator
 from logs.logger_factory import get_logger
 
@@ -10,11 +25,70 @@ logger = get_logger("speech2text", "speech2text.log")
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     try:
-       app.state.speech_model = SpeechModel()
-       app.state.text_model = TextModel()
+       # Wrappers are cheap to construct; weights load on first use (or below, in "startup" mode).
+       registry = ModelRegistry(settings.MODEL_MEMORY_BUDGET_MB)
+       app.state.model_registry = registry
+       for name in settings.SPEECH_MODEL_NAMES:
+           registry.register(f"whisper:{name}", SpeechModel(name), warmup=settings.MODEL_WARMUP)
+       if settings.TEXT_MODEL_BACKEND == "onnx":
+           text_model = OnnxTextModel(settings.TEXT_ONNX_MODEL_DIR, settings.TEXT_ONNX_NUM_THREADS)
+           app.state.text_model_key = f"mbart-onnx:{settings.TEXT_ONNX_MODEL_DIR}"
+       else:
+           text_model = TextModel(settings.TEXT_MODEL_PATH)
+           app.state.text_model_key = f"mbart:{settings.TEXT_MODEL_PATH or text_model.model_name}"
+       registry.register(app.state.text_model_key, text_model, warmup=settings.MODEL_WARMUP)
+       app.state.speech_model_key = f"whisper:{settings.SPEECH_MODEL_NAMES[0]}"
+       app.state.text_model = text_model
+       app.state.speech_executor = InferenceExecutor(
+           "speech", max_workers=settings.SPEECH_EXECUTOR_WORKERS, max_queue=settings.SPEECH_EXECUTOR_QUEUE
+       )
+       app.state.text_executor = InferenceExecutor(
+           "text", max_workers=settings.TEXT_EXECUTOR_WORKERS, max_queue=settings.TEXT_EXECUTOR_QUEUE
+       )
+       app.state.text_batcher = TranslationBatcher(
+           registry,
+           app.state.text_model_key,
+           app.state.text_executor,
+           max_batch_size=settings.TEXT_BATCH_MAX_SIZE,
+           max_wait_ms=settings.TEXT_BATCH_MAX_WAIT_MS,
+           max_pending=settings.TEXT_BATCH_MAX_PENDING,
+       )
+       app.state.speech_batcher = SpeechBatcher(
+           registry,
+           app.state.speech_model_key,
+           app.state.speech_executor,
+           max_batch_size=settings.SPEECH_BATCH_MAX_SIZE,
+           max_wait_ms=settings.SPEECH_BATCH_MAX_WAIT_MS,
+           max_pending=settings.SPEECH_BATCH_MAX_PENDING,
+       )
+       app.state.translation_cache = None
+       if settings.TRANSLATION_CACHE_ENABLED:
+           app.state.translation_cache = TranslationCache(
+               max_entries=settings.TRANSLATION_CACHE_MAX_ENTRIES,
+               ttl_seconds=settings.TRANSLATION_CACHE_TTL_SECONDS,
+               sqlite_path=settings.TRANSLATION_CACHE_SQLITE_PATH,
+               model_version=settings.TEXT_MODEL_VERSION,
+               max_disk_entries=settings.TRANSLATION_CACHE_DISK_MAX_ENTRIES,
+               flush_interval_s=settings.TRANSLATION_CACHE_FLUSH_INTERVAL_S,
+               flush_batch_size=settings.TRANSLATION_CACHE_FLUSH_BATCH,
+           )
+           await app.state.translation_cache.start()
+       await app.state.text_batcher.start()
+       await app.state.speech_batcher.start()
+       if settings.MODEL_LOAD_MODE == "startup":
+           await registry.preload()
        yield
-       app.state.speech_model = None
+       await app.state.speech_batcher.stop()
+       await app.state.text_batcher.stop()
+       if app.state.translation_cache is not None:
+           await app.state.translation_cache.close()
+       app.state.translation_cache = None
+       app.state.text_batcher = None
+       app.state.speech_batcher = None
+       app.state.speech_executor.shutdown()
+       app.state.text_executor.shutdown()
        app.state.text_model = None
+       app.state.model_registry = None
     except Exception as e:
         logger.exception(f"🔥 Error during audio translation: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -22,6 +96,46 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
 
 router = APIRouter(lifespan=lifespan)
 
+
+def _overloaded(e: ExecutorOverloaded) -> HTTPException:
+    logger.warning(f"⚠️ {e}")
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+
+def _text_model(app: FastAPI) -> AbstractAsyncContextManager[TextModel]:
+    """
+    The translation model, loaded through the registry and pinned until the
+    `async with` block exits, so it cannot be evicted while a job uses it.
+    """
+    return app.state.model_registry.use(app.state.text_model_key)
+
+
+def _speech_model(app: FastAPI, name: str | None = None) -> AbstractAsyncContextManager[SpeechModel]:
+    """
+    A Whisper model by size (default: the first of SPEECH_MODEL_NAMES), loaded
+    through the registry and pinned like `_text_model`.
+    """
+    key = f"whisper:{name}" if name else app.state.speech_model_key
+    if key not in app.state.model_registry:
+        raise HTTPException(status_code=404, detail=f"Speech model '{name}' is not registered.")
+    return app.state.model_registry.use(key)
+
+
+async def _translate(app: FastAPI, user_input: TextRequest) -> dict:
+    """Translate one request through the cache and the micro-batcher."""
+    cache: TranslationCache | None = app.state.translation_cache
+    if cache is not None:
+        key = cache.make_key(user_input.text, user_input.src_lang, user_input.tgt_lang,
+                             str(app.state.text_model))
+        if (cached := await cache.get(key)) is not None:
+            return {"text": cached}
+
+    batcher: TranslationBatcher = app.state.text_batcher
+    result = await batcher.submit(user_input)
+    if cache is not None and "text" in result:
+        await cache.put(key, result["text"])
+    return result
+
 @router.post("/audio")
 async def translate_audio(request: Request, audio_file: UploadFile = File(...)):
   try:
@@ -29,24 +143,472 @@ async def translate_audio(request: Request, audio_file: UploadFile = File(...)):
     speech_request = SpeechRequest(
       audio=contents
     )
-    model = request.app.state.speech_model
-    return model.generate(speech_request)
+    audio = await asyncio.to_thread(decode_audio, speech_request.audio)
+    AUDIO_SECONDS.inc(len(audio) / SAMPLE_RATE)
+    if len(audio) <= 30 * SAMPLE_RATE:
+      # Short clips share the Whisper encoder/decoder with concurrent requests
+      batcher: SpeechBatcher = request.app.state.speech_batcher
+      return await batcher.submit(audio)
 
+    executor: InferenceExecutor = request.app.state.speech_executor
+    async with _speech_model(request.app) as model:
+      result = await executor.run(model.transcribe, audio)
+    return {"text": result["text"]}
+
+  except ExecutorOverloaded as e:
+    raise _overloaded(e)
   except Exception as e:
     logger.exception(f"🔥 Error during audio translation: {e}")
     return JSONResponse(status_code=500, content={"error": str(e)})
 
 
+async def _read_upload(upload: UploadFile, chunk_size: int):
+    while chunk := await upload.read(chunk_size):
+        yield chunk
+
+
+@router.post("/audio/long")
+async def transcribe_long_audio(
+    request: Request, audio_file: UploadFile = File(...), whisper_model: str | None = None
+):
+    """
+    Transcribe a long recording with bounded memory.
+
+    The upload is streamed to the decoder in fixed-size chunks and cut into
+    overlapping windows, which are transcribed across the speech worker pool
+    and stitched back together by timestamp. `whisper_model` picks any size
+    listed in SPEECH_MODEL_NAMES.
+    """
+    try:
+        executor: InferenceExecutor = request.app.state.speech_executor
+        async with _speech_model(request.app, whisper_model) as model:
+            windows = iter_audio_windows(
+                _read_upload(audio_file, settings.LONG_AUDIO_READ_CHUNK_BYTES),
+                settings.LONG_AUDIO_WINDOW_S,
+                settings.LONG_AUDIO_OVERLAP_S,
+            )
+            segments = [
+                segment async for segment in transcribe_windows(
+                    windows,
+                    lambda audio: executor.run(model.transcribe, audio),
+                    settings.LONG_AUDIO_WINDOW_S,
+                    settings.LONG_AUDIO_OVERLAP_S,
+                    max_inflight=executor.max_workers,
+                )
+            ]
+        return {"text": " ".join(segment["text"] for segment in segments), "segments": segments}
+
+    except HTTPException:
+        raise
+    except ExecutorOverloaded as e:
+        raise _overloaded(e)
+    except Exception as e:
+        logger.exception(f"🔥 Error during long audio transcription: {e}")
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+
+async def speech_translation_generator(
+    app: FastAPI, audio_file: UploadFile, tgt_lang: str, src_lang: str | None
+) -> AsyncGenerator[str, None]:
+    """
+    Pipeline Whisper and MBart: each transcribed segment is handed to the
+    translation batcher as soon as its window is decoded, while later windows
+    are still being transcribed. Translations are streamed back in order.
+    For an English target Whisper's own task="translate" is used and MBart is skipped.
+    """
+    translate_in_whisper = tgt_lang.split("_")[0] == "en"
+    tasks: asyncio.Queue[tuple[dict, asyncio.Future] | None] = asyncio.Queue()
+    producer: asyncio.Task | None = None
+    # Both models stay pinned until the stream ends; with MBart pinned (and so
+    # loaded), resolve_lang_code is a cheap lookup that is safe on the event loop.
+    models = AsyncExitStack()
+    try:
+        speech_model = await models.enter_async_context(_speech_model(app))
+        text_model = None if translate_in_whisper else await models.enter_async_context(_text_model(app))
+        executor: InferenceExecutor = app.state.speech_executor
+        options = {"task": "translate"} if translate_in_whisper else {}
+
+        async def produce() -> None:
+            try:
+                windows = iter_audio_windows(
+                    _read_upload(audio_file, settings.LONG_AUDIO_READ_CHUNK_BYTES),
+                    settings.LONG_AUDIO_WINDOW_S,
+                    settings.LONG_AUDIO_OVERLAP_S,
+                )
+                async for segment in transcribe_windows(
+                    windows,
+                    lambda audio: executor.run(speech_model.transcribe, audio, **options),
+                    settings.LONG_AUDIO_WINDOW_S,
+                    settings.LONG_AUDIO_OVERLAP_S,
+                    max_inflight=executor.max_workers,
+                ):
+                    if translate_in_whisper:
+                        future = asyncio.get_running_loop().create_future()
+                        future.set_result({"text": segment["text"]})
+                    else:
+                        source = src_lang or text_model.resolve_lang_code(segment["language"] or "en") or "en_XX"
+                        future = asyncio.ensure_future(_translate(app, TextRequest(
+                            text=segment["text"], src_lang=source, tgt_lang=tgt_lang, model=text_model.model_name,
+                        )))
+                    await tasks.put((segment, future))
+            finally:
+                await tasks.put(None)
+
+        producer = asyncio.create_task(produce())
+        while (item := await tasks.get()) is not None:
+            segment, future = item
+            result = await future
+            if "error" in result:
+                yield f"data: {json.dumps({'type': 'error', 'content': result['error']})}\n\n"
+                break
+            yield f"data: {json.dumps({'type': 'token', 'content': result['text'] + ' '})}\n\n"
+        else:
+            # Surfaces a transcription error raised by the producer
+            await producer
+
+    except ExecutorOverloaded as e:
+        logger.warning(f"⚠️ {e}")
+        yield f"data: {json.dumps({'type': 'error', 'content': str(e)})}\n\n"
+    except Exception as e:
+        logger.exception(f"🔥 Error during speech translation: {e}")
+        yield f"data: {json.dumps({'type': 'error', 'content': 'Internal server error'})}\n\n"
+    finally:
+        # On an error or a client disconnect, stop transcribing the rest of the file right away
+        if producer is not None and not producer.done():
+            producer.cancel()
+            await asyncio.wait({producer})
+        while not tasks.empty():
+            if (item := tasks.get_nowait()) is not None:
+                item[1].cancel()
+        await models.aclose()
+    yield "data: [DONE]\n\n"
+
+
+@router.post("/audio/translate", response_class=StreamingResponse)
+async def translate_speech(
+    request: Request, tgt_lang: str, src_lang: str | None = None, audio_file: UploadFile = File(...)
+) -> StreamingResponse:
+    """
+    Speech-to-translation in one call: audio in, translated segments streamed
+    out over SSE as `token` events. `tgt_lang` / `src_lang` are MBart-50 codes;
+    the source language is detected by Whisper when omitted.
+    """
+    return StreamingResponse(
+        speech_translation_generator(request.app, audio_file, tgt_lang, src_lang),
+        media_type="text/event-stream",
+    )
+
+
+@router.websocket("/stream")
+async def transcribe_stream(websocket: WebSocket):
+    """
+    Real-time speech recognition.
+
+    The client sends binary frames of 16 kHz mono signed 16-bit PCM as it
+    captures them, and a text frame `{"type": "end"}` when done. The server
+    segments speech with voice-activity detection and replies with JSON:
+    `{"type": "partial", "text"}` while a segment is being spoken,
+    `{"type": "final", "text", "start", "end"}` when it closes, then `{"type": "done"}`.
+    """
+    await websocket.accept()
+    # Pinned for the whole session: segments are transcribed until the client ends it
+    models = AsyncExitStack()
+    model = await models.enter_async_context(_speech_model(websocket.app))
+    executor: InferenceExecutor = websocket.app.state.speech_executor
+    segmenter = VoiceActivitySegmenter(
+        energy_threshold=settings.STREAM_VAD_ENERGY_THRESHOLD,
+        silence_ms=settings.STREAM_VAD_SILENCE_MS,
+        max_segment_s=settings.STREAM_MAX_SEGMENT_S,
+    )
+    finished: asyncio.Queue[SpeechSegment | None] = asyncio.Queue()
+    partial_task: asyncio.Task | None = None
+    last_partial = time.monotonic()
+
+    async def send_finals() -> None:
+        while (segment := await finished.get()) is not None:
+            try:
+                result = await executor.run(model.transcribe, segment.audio)
+                await websocket.send_json({
+                    "type": "final", "text": result["text"].strip(), "start": segment.start, "end": segment.end,
+                })
+            except ExecutorOverloaded as e:
+                await websocket.send_json({"type": "error", "content": str(e)})
+
+    async def send_partial(audio) -> None:
+        try:
+            result = await executor.run(model.transcribe, audio)
+            await websocket.send_json({"type": "partial", "text": result["text"].strip()})
+        except ExecutorOverloaded:
+            pass  # partials are best effort
+
+    finals_task = asyncio.create_task(send_finals())
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes"):
+                AUDIO_SECONDS.inc(len(message["bytes"]) / 2 / SAMPLE_RATE)
+                for segment in segmenter.push(pcm16_to_float32(message["bytes"])):
+                    finished.put_nowait(segment)
+            elif message.get("text") and json.loads(message["text"]).get("type") == "end":
+                for segment in segmenter.flush():
+                    finished.put_nowait(segment)
+                finished.put_nowait(None)
+                await finals_task
+                await websocket.send_json({"type": "done"})
+                break
+
+            if time.monotonic() - last_partial >= settings.STREAM_PARTIAL_INTERVAL_S:
+                pending = segmenter.pending_audio()
+                if pending is not None and (partial_task is None or partial_task.done()):
+                    partial_task = asyncio.create_task(send_partial(pending))
+                    last_partial = time.monotonic()
+
+    except WebSocketDisconnect:
+        logger.info("🔌 Speech stream client disconnected")
+    except Exception as e:
+        logger.exception(f"🔥 Error during streaming speech recognition: {e}")
+    finally:
+        finals_task.cancel()
+        if partial_task is not None:
+            partial_task.cancel()
+        # Unpin only once no transcription of this session can still be running
+        await asyncio.wait({finals_task, partial_task} - {None})
+        await models.aclose()
+
+
 @router.post("/text")
 async def translate_text(request: Request, user_input: TextRequest):
     try:
         if not user_input.text:
             logger.error("❌ Text is required for translation.")
             raise HTTPException(status_code=400, detail="Text is required for translation.")
-        model = request.app.state.text_model
-        return model.generate(user_input)
+        return await _translate(request.app, user_input)
     
+    except ExecutorOverloaded as e:
+        raise _overloaded(e)
     except Exception as e:
         logger.exception(f"🔥 Error during text translation: {e}")
         return JSONResponse(status_code=500, content={"error": str(e)})
 
+
+async def document_generator(app: FastAPI, user_input: TextRequest) -> AsyncGenerator[str, None]:
+    """
+    Translate a long document chunk by chunk and stream the chunks back in order.
+
+    A sliding window of about two batches of chunks is kept in the batcher, so
+    chunks are translated in full batches without flooding the shared queue;
+    each one is yielded as soon as it and every chunk before it are done, and
+    the next chunk is submitted in its place.
+    """
+    tasks: deque[asyncio.Task] = deque()
+    try:
+        executor: InferenceExecutor = app.state.text_executor
+        async with _text_model(app) as model:
+            chunks = await executor.run(
+                split_document,
+                user_input.text,
+                settings.DOCUMENT_CHUNK_MAX_TOKENS,
+                lambda s: model.count_tokens(s, user_input.src_lang),
+                model.split_long,
+            )
+        pending = iter(chunks)
+
+        def refill() -> None:
+            while len(tasks) < 2 * settings.TEXT_BATCH_MAX_SIZE and (next_chunk := next(pending, None)) is not None:
+                tasks.append(asyncio.create_task(
+                    _translate(app, user_input.model_copy(update={"text": next_chunk.text}))
+                ))
+
+        refill()
+        for chunk in chunks:
+            result = await tasks.popleft()
+            refill()
+            if "error" in result:
+                yield f"data: {json.dumps({'type': 'error', 'content': result['error']})}\n\n"
+                break
+            yield f"data: {json.dumps({'type': 'token', 'content': result['text'] + chunk.separator})}\n\n"
+
+    except ExecutorOverloaded as e:
+        logger.warning(f"⚠️ {e}")
+        yield f"data: {json.dumps({'type': 'error', 'content': str(e)})}\n\n"
+    except Exception as e:
+        logger.exception(f"🔥 Error during document translation: {e}")
+        yield f"data: {json.dumps({'type': 'error', 'content': 'Internal server error'})}\n\n"
+    finally:
+        for task in tasks:
+            task.cancel()
+        yield "data: [DONE]\n\n"
+
+
+@router.post("/text/document", response_class=StreamingResponse)
+async def translate_document(request: Request, user_input: TextRequest) -> StreamingResponse:
+    """
+    Translate a long document in sentence/paragraph chunks and stream each
+    translated chunk over SSE, in the original order, as soon as it is ready.
+    """
+    if not user_input.text:
+        raise HTTPException(status_code=400, detail="Text is required for translation.")
+    return StreamingResponse(
+        document_generator(request.app, user_input),
+        media_type="text/event-stream",
+    )
+
+
+async def translation_stream_generator(app: FastAPI, user_input: TextRequest) -> AsyncGenerator[str, None]:
+    """
+    Stream decoded text increments of one translation as the MBart decoder produces them.
+    If the client disconnects, the decoder is stopped at its next step.
+    """
+    job: asyncio.Future | None = None
+    stop = threading.Event()
+    models = AsyncExitStack()
+    try:
+        cache: TranslationCache | None = app.state.translation_cache
+        if cache is not None:
+            key = cache.make_key(user_input.text, user_input.src_lang, user_input.tgt_lang,
+                                 str(app.state.text_model))
+            if (cached := await cache.get(key)) is not None:
+                yield f"data: {json.dumps({'type': 'token', 'content': cached})}\n\n"
+                yield "data: [DONE]\n\n"
+                return
+
+        model = await models.enter_async_context(_text_model(app))
+
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue[str | None] = asyncio.Queue()
+        executor: InferenceExecutor = app.state.text_executor
+        job = asyncio.ensure_future(
+            executor.run(
+                model.generate_stream, user_input, lambda text: loop.call_soon_threadsafe(queue.put_nowait, text), stop
+            )
+        )
+        job.add_done_callback(lambda _: queue.put_nowait(None))
+
+        # Whitespace-only increments (e.g. "\n" between sentences) are merged into the next token
+        held = ""
+        while (text := await queue.get()) is not None:
+            held += text
+            if held.strip():
+                yield f"data: {json.dumps({'type': 'token', 'content': held})}\n\n"
+                held = ""
+
+        result = await job
+        if "error" in result:
+            yield f"data: {json.dumps({'type': 'error', 'content': result['error']})}\n\n"
+        elif cache is not None:
+            await cache.put(key, result["text"])
+
+    except ExecutorOverloaded as e:
+        logger.warning(f"⚠️ {e}")
+        yield f"data: {json.dumps({'type': 'error', 'content': str(e)})}\n\n"
+    except Exception as e:
+        logger.exception(f"🔥 Error during streaming text translation: {e}")
+        yield f"data: {json.dumps({'type': 'error', 'content': 'Internal server error'})}\n\n"
+    finally:
+        # Frees the text worker right away when the client is gone; the model stays pinned until it has
+        stop.set()
+        if job is not None and not job.done():
+            await asyncio.wait({job})
+        await models.aclose()
+    yield "data: [DONE]\n\n"
+
+
+@router.post("/text/stream", response_class=StreamingResponse)
+async def translate_text_stream(request: Request, user_input: TextRequest) -> StreamingResponse:
+    """
+    Streaming variant of /text: translated text is pushed over SSE as `token`
+    events while MBart decodes, followed by `data: [DONE]`.
+    """
+    if not user_input.text:
+        raise HTTPException(status_code=400, detail="Text is required for translation.")
+    return StreamingResponse(
+        translation_stream_generator(request.app, user_input),
+        media_type="text/event-stream",
+    )
+
+
+@router.post("/text/batch")
+async def translate_text_batch(request: Request, user_input: TextBatchRequest):
+    try:
+        if not user_input.segments:
+            logger.error("❌ At least one segment is required for translation.")
+            raise HTTPException(status_code=400, detail="At least one segment is required for translation.")
+        async with _text_model(request.app) as model:
+            executor: InferenceExecutor = request.app.state.text_executor
+            cache: TranslationCache | None = request.app.state.translation_cache
+            if cache is None:
+                results = await executor.run(model.generate_bucketed, user_input, settings.TEXT_BUCKET_SIZE)
+                return {"results": results}
+
+            keys = [cache.make_key(segment, user_input.src_lang, user_input.tgt_lang, str(model))
+                    for segment in user_input.segments]
+            results: list[dict | None] = []
+            missing: list[int] = []
+            for i, key in enumerate(keys):
+                cached = await cache.get(key)
+                results.append({"text": cached} if cached is not None else None)
+                if cached is None:
+                    missing.append(i)
+
+            if missing:
+                pending = user_input.model_copy(update={"segments": [user_input.segments[i] for i in missing]})
+                translated = await executor.run(model.generate_bucketed, pending, settings.TEXT_BUCKET_SIZE)
+                for i, result in zip(missing, translated):
+                    results[i] = result
+                    if "text" in result:
+                        await cache.put(keys[i], result["text"])
+            return {"results": results}
+
+    except HTTPException:
+        raise
+    except ExecutorOverloaded as e:
+        raise _overloaded(e)
+    except Exception as e:
+        logger.exception(f"🔥 Error during batch text translation: {e}")
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+
+@router.get("/text/stats")
+async def text_stats(request: Request):
+    """Batcher batch-size / queue-wait distribution and translation cache counters."""
+    batcher: TranslationBatcher = request.app.state.text_batcher
+    cache: TranslationCache | None = request.app.state.translation_cache
+    return {
+        "batcher": batcher.stats.snapshot(),
+        "cache": cache.stats.snapshot() if cache is not None else None,
+    }
+
+
+@router.get("/audio/stats")
+async def audio_stats(request: Request):
+    """Batch sizes and per-clip latency of the Whisper batcher."""
+    batcher: SpeechBatcher = request.app.state.speech_batcher
+    return batcher.stats.snapshot()
+
+
+@router.get("/models")
+async def model_stats(request: Request):
+    """Registered models, whether they are loaded, their resident memory and load time."""
+    registry: ModelRegistry = request.app.state.model_registry
+    return registry.stats()
+
+
+@router.get("/executors")
+async def executor_stats(request: Request):
+    """Queue depth and in-flight counts of the inference worker pools."""
+    return {
+        "speech": request.app.state.speech_executor.stats(),
+        "text": request.app.state.text_executor.stats(),
+    }
+
+
+@router.delete("/text/cache")
+async def invalidate_text_cache(request: Request, model_version: str | None = None):
+    """Drop cached translations for a model version (all versions when omitted)."""
+    cache: TranslationCache | None = request.app.state.translation_cache
+    if cache is None:
+        raise HTTPException(status_code=404, detail="Translation cache is disabled.")
+    return {"removed": await asyncio.to_thread(cache.invalidate, model_version)}
+
@@ -1,13 +1,17 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.exception_handlers import http_exception_handler
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
+import time
 import traceback
 
 from backend.api.chat import router as chat_router
 from backend.api.speech2text import router as speech2text_router
+from core import settings
+from core.metrics import HTTP_REQUEST_SECONDS, HTTP_REQUESTS_IN_FLIGHT, registry as metrics_registry
+from logs import tracing
 from logs.logger_factory import get_logger
 import traceback  
 import uvicorn
@@ -25,11 +29,35 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# ✅ Middleware log 
+async def _end_trace_after(body_iterator, trace: tracing.Trace):
+    # Streaming bodies keep adding spans; the trace is exported once the body is sent
+    try:
+        async for chunk in body_iterator:
+            yield chunk
+    finally:
+        tracing.end_trace(trace)
+
+
+# ✅ Middleware log + metrics + tracing
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
+    started = time.perf_counter()
+    HTTP_REQUESTS_IN_FLIGHT.inc(1, request.method)
+    status = 500
+    want_summary = request.query_params.get("trace") == "1"
+    trace = None
+    if settings.TRACING_ENABLED or want_summary:
+        trace = tracing.start_trace(f"{request.method} {request.url.path}")
     try:
         response = await call_next(request)
+        status = response.status_code
+        if trace is not None:
+            route = request.scope.get("route")
+            trace.name = f"{request.method} {getattr(route, 'path', request.url.path)}"
+            response.headers["X-Trace-Id"] = trace.trace_id
+            if want_summary:
+                response.headers["Server-Timing"] = trace.server_timing()
+            response.body_iterator = _end_trace_after(response.body_iterator, trace)
         if response.status_code >= 400:
             body = await request.body()
             logger.warning(f"❌ {request.method} {request.url} returned {response.status_code}")
@@ -39,7 +67,16 @@ async def log_requests(request: Request, call_next):
         tb = traceback.format_exc()
         logger.error(f"🔥 Exception in request: {request.method} {request.url}")
         logger.error(tb)
+        if trace is not None:
+            tracing.end_trace(trace)
         raise e
+    finally:
+        HTTP_REQUESTS_IN_FLIGHT.dec(1, request.method)
+        # Route template, not the raw path, keeps label cardinality bounded
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - started, request.method, getattr(route, "path", "unmatched"), status
+        )
 
 # ✅ Handler System Error (Exception)
 @app.exception_handler(Exception)
@@ -71,6 +108,11 @@ async def validation_exception_handler(request, exc):
 app.include_router(chat_router, prefix="/chat", tags=["chat"])
 app.include_router(speech2text_router, prefix="/speech2text", tags=["speech2text"])
 
+# ✅ metrics
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
 # ✅ app
 if __name__ == "__main__":
     logger.info("🚀 Starting FastAPI server...")
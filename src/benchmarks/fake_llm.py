@@ -0,0 +1,96 @@
+"""
+Stub OpenAI-compatible LLM server for benchmarks.
+
+Serves GET /v1/models and POST /v1/chat/completions (streaming and not),
+answering with canned tokens after a fixed first-token latency and at a
+fixed token rate, so backend numbers do not depend on a GPU or the network.
+
+Usage (from src/):
+    python -m benchmarks.fake_llm --port 9000 --tokens 64 --tokens-per-second 50 --ttft-ms 100
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+WORDS = ("the", "quick", "brown", "fox", "jumps", "over", "a", "lazy", "dog", "while", "translation", "runs")
+
+
+def create_app(tokens: int = 64, tokens_per_second: float = 50.0, ttft_ms: float = 100.0) -> FastAPI:
+    app = FastAPI()
+    interval = 1 / tokens_per_second if tokens_per_second > 0 else 0.0
+
+    def completion_tokens(body: dict) -> list[str]:
+        n = min(tokens, body.get("max_tokens") or tokens)
+        return [(" " if i else "") + WORDS[i % len(WORDS)] for i in range(n)]
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "fake", "object": "model", "owned_by": "benchmarks"}]}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        model = body.get("model", "fake")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        pieces = completion_tokens(body)
+
+        if not body.get("stream"):
+            await asyncio.sleep(ttft_ms / 1000 + interval * max(len(pieces) - 1, 0))
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [
+                    {"index": 0, "message": {"role": "assistant", "content": "".join(pieces)}, "finish_reason": "stop"}
+                ],
+                "usage": {"prompt_tokens": 0, "completion_tokens": len(pieces), "total_tokens": len(pieces)},
+            }
+
+        def chunk(delta: dict, finish_reason: str | None = None) -> str:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            return f"data: {json.dumps(payload)}\n\n"
+
+        async def stream():
+            await asyncio.sleep(ttft_ms / 1000)
+            yield chunk({"role": "assistant", "content": ""})
+            for i, piece in enumerate(pieces):
+                if i:
+                    await asyncio.sleep(interval)
+                yield chunk({"content": piece})
+            yield chunk({}, "stop")
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--tokens", type=int, default=64, help="Tokens per completion.")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0, help="Streaming rate after the first token.")
+    parser.add_argument("--ttft-ms", type=float, default=100.0, help="Delay before the first token.")
+    args = parser.parse_args()
+
+    app = create_app(args.tokens, args.tokens_per_second, args.ttft_ms)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
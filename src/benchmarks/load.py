@@ -0,0 +1,315 @@
+"""
+Load-test /chat/invoke and /chat/stream at stepped concurrency.
+
+With --start, a stub LLM (benchmarks.fake_llm) and the backend are started
+as subprocesses. The backend's local models are pointed at the stub through
+LLM_DEFAULT_UPSTREAMS, so any LocalvLLMModelName (the default
+"llama-32-1B-instruct") is served without a GPU. Without --start, an already
+running backend is used. Pass --backend-pid to sample its CPU and RSS.
+
+For each endpoint and concurrency level, the run reports throughput,
+p50/p95/p99 latency, time-to-first-token and the gap between token frames
+(streamed tokens are coalesced per SSE_FLUSH_MS; --sse-flush-ms 0 sends one
+frame per token). It also reports backend CPU and peak RSS. Results are
+written as JSON, and --compare flags regressions against an earlier run.
+
+Usage (from src/):
+    python -m benchmarks.load --start --levels 1,4,16 --requests 100 --output bench.json
+    python -m benchmarks.load --start --output new.json --compare bench.json --max-regression 0.1
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import uuid
+
+import httpx
+
+try:
+    import psutil
+except ImportError:  # optional: results then omit backend CPU / RSS
+    psutil = None
+
+
+def percentile(values: list[float], q: float) -> float | None:
+    """Linear-interpolated percentile, q in [0, 100]."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(values: list[float]) -> dict:
+    return {
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "mean": sum(values) / len(values) if values else None,
+    }
+
+
+def chat_body(message: str, model: str) -> dict:
+    # A fresh thread per request keeps prompts the same size across the run
+    return {
+        "message": message,
+        "thread_id": str(uuid.uuid4()),
+        "user_id": "benchmark",
+        "agent_config": {"cache": False},
+        "model": model,
+    }
+
+
+async def invoke_once(client: httpx.AsyncClient, model: str, message: str) -> dict:
+    started = time.perf_counter()
+    response = await client.post("/chat/invoke", json=chat_body(message, model))
+    response.raise_for_status()
+    content = response.json().get("content", "")
+    return {"latency": time.perf_counter() - started, "tokens": len(content.split())}
+
+
+async def stream_once(client: httpx.AsyncClient, model: str, message: str) -> dict:
+    started = time.perf_counter()
+    first_token = None
+    last_frame = None
+    gaps: list[float] = []
+    tokens = 0
+    async with client.stream("POST", "/chat/stream", json={**chat_body(message, model), "stream_tokens": True}) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line.startswith("data: ") or line == "data: [DONE]":
+                continue
+            event = json.loads(line[6:])
+            if event["type"] == "error":
+                raise RuntimeError(event["content"])
+            if event["type"] != "token":
+                continue
+            now = time.perf_counter()
+            if first_token is None:
+                first_token = now - started
+            else:
+                gaps.append(now - last_frame)
+            last_frame = now
+            tokens += len(event["content"].split())
+    return {"latency": time.perf_counter() - started, "ttft": first_token, "gaps": gaps, "tokens": tokens}
+
+
+class ResourceSampler:
+    """Samples a process's CPU% and RSS in the background while a step runs."""
+
+    def __init__(self, pid: int | None, interval_s: float = 0.5):
+        self.process = psutil.Process(pid) if psutil is not None and pid else None
+        self.interval_s = interval_s
+        self.cpu: list[float] = []
+        self.rss: list[int] = []
+        self._task: asyncio.Task | None = None
+
+    async def _run(self) -> None:
+        self.process.cpu_percent(None)
+        while True:
+            await asyncio.sleep(self.interval_s)
+            self.cpu.append(self.process.cpu_percent(None))
+            self.rss.append(self.process.memory_info().rss)
+
+    def start(self) -> None:
+        if self.process is not None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> dict | None:
+        if self._task is None:
+            return None
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        return {
+            "cpu_percent_mean": sum(self.cpu) / len(self.cpu) if self.cpu else None,
+            "cpu_percent_max": max(self.cpu, default=None),
+            "rss_mb_max": max(self.rss) / 2**20 if self.rss else None,
+        }
+
+
+async def run_level(
+    base_url: str, endpoint: str, concurrency: int, requests: int, model: str, message: str, pid: int | None
+) -> dict:
+    call = stream_once if endpoint == "stream" else invoke_once
+    results: list[dict] = []
+    errors: list[str] = []
+    remaining = requests
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=httpx.Timeout(300.0)) as client:
+
+        async def worker() -> None:
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                try:
+                    results.append(await call(client, model, message))
+                except Exception as e:
+                    errors.append(f"{type(e).__name__}: {e}")
+
+        sampler = ResourceSampler(pid)
+        sampler.start()
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall = time.perf_counter() - started
+        resources = await sampler.stop()
+
+    latencies = [r["latency"] * 1000 for r in results]
+    level = {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": requests,
+        "completed": len(results),
+        "errors": len(errors),
+        "error_samples": errors[:5],
+        "wall_s": wall,
+        "throughput_rps": len(results) / wall if wall else 0.0,
+        "tokens_per_second": sum(r["tokens"] for r in results) / wall if wall else 0.0,
+        "latency_ms": summarize(latencies),
+        "backend": resources,
+    }
+    if endpoint == "stream":
+        level["ttft_ms"] = summarize([r["ttft"] * 1000 for r in results if r["ttft"] is not None])
+        level["inter_frame_gap_ms"] = summarize([g * 1000 for r in results for g in r["gaps"]])
+    return level
+
+
+def wait_for(url: str, timeout_s: float) -> None:
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=2.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"{url} did not become ready within {timeout_s:.0f}s")
+
+
+def start_services(args) -> list[subprocess.Popen]:
+    fake = subprocess.Popen([
+        sys.executable, "-m", "benchmarks.fake_llm",
+        "--port", str(args.fake_port),
+        "--tokens", str(args.fake_tokens),
+        "--tokens-per-second", str(args.fake_tokens_per_second),
+        "--ttft-ms", str(args.fake_ttft_ms),
+    ])
+    wait_for(f"http://127.0.0.1:{args.fake_port}/v1/models", 30)
+
+    env = {
+        **os.environ,
+        "LLM_DEFAULT_UPSTREAMS": json.dumps([f"http://127.0.0.1:{args.fake_port}/v1"]),
+        "VLLM_API_KEY": os.environ.get("VLLM_API_KEY", "benchmark"),
+        "CHECKPOINTER_BACKEND": "memory",
+        "SSE_FLUSH_MS": str(args.sse_flush_ms),
+        "MODEL_LOAD_MODE": "lazy",
+    }
+    backend = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(args.port), "--log-level", "warning"],
+        env=env,
+    )
+    wait_for(f"http://127.0.0.1:{args.port}/metrics", args.startup_timeout)
+    return [backend, fake]
+
+
+def compare(current: dict, baseline: dict, max_regression: float) -> list[str]:
+    """
+    Regressions of throughput and p95 latency / TTFT beyond `max_regression` (a fraction).
+    """
+    previous = {(r["endpoint"], r["concurrency"]): r for r in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        before = previous.get((result["endpoint"], result["concurrency"]))
+        if before is None:
+            continue
+        key = f"{result['endpoint']}@{result['concurrency']}"
+        if before["throughput_rps"] and result["throughput_rps"] < before["throughput_rps"] * (1 - max_regression):
+            regressions.append(f"{key} throughput {before['throughput_rps']:.2f} -> {result['throughput_rps']:.2f} rps")
+        for metric in ("latency_ms", "ttft_ms"):
+            old, new = (before.get(metric) or {}).get("p95"), (result.get(metric) or {}).get("p95")
+            if old and new and new > old * (1 + max_regression):
+                regressions.append(f"{key} {metric} p95 {old:.1f} -> {new:.1f}")
+    return regressions
+
+
+async def run(args, pid: int | None) -> dict:
+    base_url = args.backend_url or f"http://127.0.0.1:{args.port}"
+    results = []
+    for endpoint in args.endpoints.split(","):
+        for concurrency in (int(level) for level in args.levels.split(",")):
+            # Warm up connections, the agent and the model path before measuring
+            await run_level(base_url, endpoint, concurrency, concurrency, args.model, args.message, None)
+            level = await run_level(base_url, endpoint, concurrency, args.requests, args.model, args.message, pid)
+            results.append(level)
+            print(
+                f"📊 {endpoint:<6} c={concurrency:<3} {level['throughput_rps']:7.2f} rps  "
+                f"p50={level['latency_ms']['p50'] or 0:8.1f}ms  p95={level['latency_ms']['p95'] or 0:8.1f}ms  "
+                f"p99={level['latency_ms']['p99'] or 0:8.1f}ms  errors={level['errors']}"
+            )
+    return {
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "host": {"platform": platform.platform(), "python": platform.python_version(), "cpus": os.cpu_count()},
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--start", action="store_true", help="Start the stub LLM and the backend as subprocesses.")
+    parser.add_argument("--backend-url", default=None, help="Use a running backend instead (default with --start: local).")
+    parser.add_argument("--backend-pid", type=int, default=None, help="PID of a running backend, for CPU / RSS.")
+    parser.add_argument("--port", type=int, default=8100, help="Backend port when started with --start.")
+    parser.add_argument("--model", default="llama-32-1B-instruct")
+    parser.add_argument("--message", default="Translate 'good morning' to Vietnamese.")
+    parser.add_argument("--endpoints", default="invoke,stream")
+    parser.add_argument("--levels", default="1,2,4,8,16", help="Comma-separated concurrency levels.")
+    parser.add_argument("--requests", type=int, default=50, help="Requests per endpoint and level.")
+    parser.add_argument("--fake-port", type=int, default=9000)
+    parser.add_argument("--fake-tokens", type=int, default=64)
+    parser.add_argument("--fake-tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--fake-ttft-ms", type=float, default=100.0)
+    parser.add_argument("--sse-flush-ms", type=float, default=30.0)
+    parser.add_argument("--startup-timeout", type=float, default=300.0)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", default=None, help="Earlier results JSON to check for regressions.")
+    parser.add_argument("--max-regression", type=float, default=0.1, help="Allowed relative slowdown.")
+    args = parser.parse_args()
+
+    processes: list[subprocess.Popen] = []
+    try:
+        pid = args.backend_pid
+        if args.start:
+            processes = start_services(args)
+            pid = processes[0].pid
+        report = asyncio.run(run(args, pid))
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait(timeout=30)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Results saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.max_regression)
+        for line in regressions:
+            print(f"❌ Regression: {line}")
+        if regressions:
+            sys.exit(1)
+        print("✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
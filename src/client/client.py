@@ -1,30 +1,103 @@
 from typing import Any
+import asyncio
+import threading
+import weakref
 import httpx
-from schema.base import UserInput, StreamInput, ChatHistoryInput, ChatHistory, ChatMessage
+from schema.base import UserInput, StreamInput, ChatHistoryInput, ChatHistory, ChatMessage, TextRequest
 import json
-from logs.logger_factory import get_logger
+from schema.http import PoolStats, create_async_client, create_client
+from logs.logger_factory import SampledLogger, get_logger
 import traceback
 from langdetect import detect
 from gtts import gTTS
 
 logger = get_logger("Client", "client.log")
+token_logger = SampledLogger(logger, interval_s=1.0)
 
 class AgentClientError(Exception):
     pass
 
 
+# End-of-iteration marker passed back from the client loop
+_END = object()
+
+
+def _shutdown(
+    client: httpx.Client, aclient: httpx.AsyncClient, loop: asyncio.AbstractEventLoop, thread: threading.Thread
+) -> None:
+    client.close()
+    if loop.is_running():
+        try:
+            asyncio.run_coroutine_threadsafe(aclient.aclose(), loop).result(timeout=5)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not close the async connection pool cleanly: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+    loop.close()
+
+
 class AgentClient:
     """
     Client for interacting with the Agent API.
+
+    Connections to the backend are pooled and kept alive across calls. An
+    async pool is tied to the event loop it runs on, and Streamlit runs every
+    script rerun in a fresh loop, so the client owns one long-lived loop on a
+    background thread with a single AsyncClient. The async methods run their
+    requests there and hand results back to the caller's loop.
     """
 
-    def __init__(self, base_url: str = "http://0.0.0.0:8000"):
+    def __init__(
+        self,
+        base_url: str = "http://0.0.0.0:8000",
+        max_connections: int = 20,
+        max_keepalive: int = 10,
+        keepalive_expiry: float = 30.0,
+        http2: bool = True,
+    ):
         self.base_url = base_url
         self.agent = None
         self.headers = {
             "Content-Type": "application/json",
             "Accept": "application/json",
         }
+        pool_options = {
+            "max_connections": max_connections,
+            "max_keepalive": max_keepalive,
+            "keepalive_expiry": keepalive_expiry,
+            "http2": http2,
+            "timeout": httpx.Timeout(60.0, read=60.0),
+        }
+        self.pool_stats = PoolStats()
+        self._client = create_client(self.pool_stats, **pool_options)
+        self._aclient = create_async_client(self.pool_stats, **pool_options)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="agent-client-loop", daemon=True)
+        self._thread.start()
+        # Closes the pools and stops the loop on close(), garbage collection or interpreter exit.
+        self._finalizer = weakref.finalize(self, _shutdown, self._client, self._aclient, self._loop, self._thread)
+
+    def _async_client(self) -> httpx.AsyncClient:
+        return self._aclient
+
+    async def _on_client_loop(self, coro):
+        """Run a coroutine on the client's loop and await its result from the caller's loop."""
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self._loop))
+
+    async def _iterate_on_client_loop(self, agen):
+        """Drive an async generator on the client's loop, yielding its items on the caller's loop."""
+
+        async def step():
+            return await anext(agen, _END)
+
+        try:
+            while (item := await self._on_client_loop(step())) is not _END:
+                yield item
+        finally:
+            await self._on_client_loop(agen.aclose())
+
+    def close(self) -> None:
+        self._finalizer()
     
     def _parse_stream_line(self, line: str) -> ChatMessage | str | None:
         line = line.strip()
@@ -51,12 +124,8 @@ class AgentClient:
                         raise Exception(f"Server returned invalid message: {e}")
                     
                 case "token":
-                    # Yield the str token directly
-                    logger.info(f"🔸 Parsed token: {parsed['content']}")
-                    token = parsed["content"]
-                    if token.strip() == "":  
-                        return None
-                    return token
+                    # Yield the str token directly; whitespace is content, only [DONE] ends the stream
+                    return parsed["content"]
                 
                 case "error":
                     error_msg = "Error: " + parsed["content"]
@@ -70,35 +139,75 @@ class AgentClient:
             thread_id: str | None = None,
             user_id: str | None = None,
             agent_config: dict[str, Any] | None = None,
+    ):
+        return await self._on_client_loop(self._ainvoke(message, model, thread_id, user_id, agent_config))
+
+    async def astream(
+            self,
+            message: str,
+            model: str,
+            thread_id: str | None = None,
+            user_id: str | None = None,
+            agent_config: dict[str, Any] | None = None,
+            stream_tokens: bool = True,
+    ):
+        async for item in self._iterate_on_client_loop(
+            self._astream(message, model, thread_id, user_id, agent_config, stream_tokens)
+        ):
+            yield item
+
+    async def astream_translation(
+            self,
+            text: str,
+            src_lang: str,
+            tgt_lang: str,
+            model: str,
+    ):
+        """
+        Stream a text translation from /speech2text/text/stream.
+
+        Yields translated text increments (str) as they are decoded, or a
+        ChatMessage carrying the error if the server reports one.
+        """
+        async for item in self._iterate_on_client_loop(self._astream_translation(text, src_lang, tgt_lang, model)):
+            yield item
+
+    async def _ainvoke(
+            self,
+            message: str,
+            model: str,
+            thread_id: str | None = None,
+            user_id: str | None = None,
+            agent_config: dict[str, Any] | None = None,
     ):
         request = UserInput(message=message, thread_id=thread_id, user_id = user_id, agent_config=agent_config)
         if model:
             request.model = model
             
-        async with httpx.AsyncClient(timeout=httpx.Timeout(60.0, read=60.0)) as client:
-            try:
-                logger.info(f"📤 Sending /chat/invoke request | thread_id={thread_id}")
-                response = await client.post(
-                    f"{self.base_url}/chat/invoke",
-                    headers=self.headers,
-                    json=request.model_dump(),
-                )
-                if response.status_code == 200:
-                    return response.json()
-                
-                else:
-                    error_body = await response.aread()
-                    tb = traceback.format_exc()
-                    logger.error(f"❌ /chat/invoke failed: {response.status_code} - {error_body.decode('utf-8')}\n{tb}")
-                    raise Exception(f"Error: {response.status_code} - {response.text}")
+        client = self._async_client()
+        try:
+            logger.info(f"📤 Sending /chat/invoke request | thread_id={thread_id}")
+            response = await client.post(
+                f"{self.base_url}/chat/invoke",
+                headers=self.headers,
+                json=request.model_dump(),
+            )
+            if response.status_code == 200:
+                return response.json()
                 
-            except httpx.RequestError as e:
+            else:
+                error_body = await response.aread()
                 tb = traceback.format_exc()
-                logger.error(f"🔥 Request error in ainvoke(): {e}\n{tb}")
-                raise Exception(f"Request failed: {e}")
+                logger.error(f"❌ /chat/invoke failed: {response.status_code} - {error_body.decode('utf-8')}\n{tb}")
+                raise Exception(f"Error: {response.status_code} - {response.text}")
+                
+        except httpx.RequestError as e:
+            tb = traceback.format_exc()
+            logger.error(f"🔥 Request error in ainvoke(): {e}\n{tb}")
+            raise Exception(f"Request failed: {e}")
 
 
-    async def astream(
+    async def _astream(
             self,
             message: str,
             model: str,
@@ -111,51 +220,91 @@ class AgentClient:
         if model:
             request.model = model
 
-        async with httpx.AsyncClient() as client:
-            try:
-                logger.info(f"📡 Streaming /chat/stream request | thread_id={thread_id}")
-                async with client.stream(
-                    "POST",
-                    f"{self.base_url}/chat/stream",
-                    headers=self.headers,
-                    json=request.model_dump(),
-                ) as response:
-                    if response.status_code == 200:
-                        async for line in response.aiter_lines():
-                            logger.debug(f"🧪 Raw stream line: {line!r}")
-                            if line.strip():
+        client = self._async_client()
+        try:
+            logger.info(f"📡 Streaming /chat/stream request | thread_id={thread_id}")
+            async with client.stream(
+                "POST",
+                f"{self.base_url}/chat/stream",
+                headers=self.headers,
+                json=request.model_dump(),
+            ) as response:
+                if response.status_code == 200:
+                    done = False
+                    async for line in response.aiter_lines():
+                        # Keep reading to the end after [DONE] so the connection goes back to the pool
+                        if line.strip() and not done:
                                 
-                                parsed = self._parse_stream_line(line)
-                                logger.info(f"🔸 Parsed stream content: {parsed}")
-                                if parsed is None:
-                                    break
+                            parsed = self._parse_stream_line(line)
+                            token_logger.debug("🔸 Parsed stream content: %r", parsed)
+                            if parsed is None:
+                                done = True
+                            elif parsed:
                                 yield parsed
-                    else:
-                        error_body = await response.aread()
-                        tb = traceback.format_exc()
-                        logger.error(f"❌ /chat/stream failed: {response.status_code} - {error_body.decode('utf-8')}\n{tb}")
-                        raise Exception(f"Error: {response.status_code} - {error_body.decode('utf-8')}")
+                else:
+                    error_body = await response.aread()
+                    tb = traceback.format_exc()
+                    logger.error(f"❌ /chat/stream failed: {response.status_code} - {error_body.decode('utf-8')}\n{tb}")
+                    raise Exception(f"Error: {response.status_code} - {error_body.decode('utf-8')}")
                     
-            except httpx.RequestError as e:
-                tb = traceback.format_exc()
-                logger.error(f"🔥 Request error in astream(): {e}\n{tb}")
-                raise Exception(f"Request failed: {e}")
+        except httpx.RequestError as e:
+            tb = traceback.format_exc()
+            logger.error(f"🔥 Request error in astream(): {e}\n{tb}")
+            raise Exception(f"Request failed: {e}")
     
-    def get_history(self, thread_id: str) -> ChatHistory:
+    async def _astream_translation(
+            self,
+            text: str,
+            src_lang: str,
+            tgt_lang: str,
+            model: str,
+    ):
+        request = TextRequest(text=text, src_lang=src_lang, tgt_lang=tgt_lang, model=model)
+
+        client = self._async_client()
+        try:
+            logger.info(f"📡 Streaming /speech2text/text/stream request | {src_lang} -> {tgt_lang}")
+            async with client.stream(
+                "POST",
+                f"{self.base_url}/speech2text/text/stream",
+                headers=self.headers,
+                json=request.model_dump(),
+            ) as response:
+                if response.status_code == 200:
+                    done = False
+                    async for line in response.aiter_lines():
+                        if line.strip() and not done:
+                            parsed = self._parse_stream_line(line)
+                            if parsed is None:
+                                done = True
+                            elif parsed:
+                                yield parsed
+                else:
+                    error_body = await response.aread()
+                    logger.error(f"❌ /speech2text/text/stream failed: {response.status_code} - {error_body.decode('utf-8')}")
+                    raise Exception(f"Error: {response.status_code} - {error_body.decode('utf-8')}")
+
+        except httpx.RequestError as e:
+            tb = traceback.format_exc()
+            logger.error(f"🔥 Request error in astream_translation(): {e}\n{tb}")
+            raise Exception(f"Request failed: {e}")
+
+    def get_history(self, thread_id: str, limit: int = 50, cursor: int | None = None) -> ChatHistory:
         """
-        Get chat history.
+        Get chat history, latest messages first.
 
         Args:
             thread_id (str, optional): Thread ID for identifying a conversation
+            limit (int): Maximum number of messages in the page
+            cursor (int, optional): `next_cursor` of the previous page, to fetch older messages
         """
-        request = ChatHistoryInput(thread_id=thread_id)
+        request = ChatHistoryInput(thread_id=thread_id, limit=limit, cursor=cursor)
         try:
-            logger.info(f"📄 Fetching /history | thread_id={thread_id}")
-            response = httpx.post(
-                f"{self.base_url}/history",
+            logger.info(f"📄 Fetching /chat/history | thread_id={thread_id} cursor={cursor}")
+            response = self._client.post(
+                f"{self.base_url}/chat/history",
                 json=request.model_dump(),
-                headers=self._headers,
-                timeout=self.timeout,
+                headers=self.headers,
             )
             response.raise_for_status()
 
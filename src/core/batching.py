@@ -0,0 +1,245 @@
+import asyncio
+import time
+from collections import Counter, defaultdict
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+
+from core.executor import ExecutorOverloaded, InferenceExecutor
+from core.registry import ModelRegistry
+from schema.base import TextRequest
+from logs import tracing
+from logs.logger_factory import get_logger
+
+logger = get_logger("batching", "batching.log")
+
+
+@dataclass
+class _Pending:
+    item: Any
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+    trace: tracing.Trace | None = field(default_factory=tracing.current_trace)
+
+
+@dataclass
+class BatcherStats:
+    """Running counters for a batcher: batch-size distribution, queue wait and per-item latency."""
+
+    batches: int = 0
+    requests: int = 0
+    batch_sizes: Counter = field(default_factory=Counter)
+    total_wait_ms: float = 0.0
+    max_wait_ms: float = 0.0
+    completed: int = 0
+    total_latency_ms: float = 0.0
+    max_latency_ms: float = 0.0
+
+    def record(self, batch_size: int, wait_ms: list[float]) -> None:
+        self.batches += 1
+        self.requests += batch_size
+        self.batch_sizes[batch_size] += 1
+        self.total_wait_ms += sum(wait_ms)
+        self.max_wait_ms = max(self.max_wait_ms, *wait_ms)
+
+    def record_latency(self, latency_ms: list[float]) -> None:
+        self.completed += len(latency_ms)
+        self.total_latency_ms += sum(latency_ms)
+        self.max_latency_ms = max(self.max_latency_ms, *latency_ms)
+
+    def snapshot(self) -> dict:
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "avg_batch_size": self.requests / self.batches if self.batches else 0.0,
+            "batch_size_distribution": dict(sorted(self.batch_sizes.items())),
+            "avg_queue_wait_ms": self.total_wait_ms / self.requests if self.requests else 0.0,
+            "max_queue_wait_ms": self.max_wait_ms,
+            "avg_latency_ms": self.total_latency_ms / self.completed if self.completed else 0.0,
+            "max_latency_ms": self.max_latency_ms,
+        }
+
+
+class MicroBatcher:
+    """
+    Dynamic micro-batching scheduler.
+
+    Concurrent items are collected until `max_batch_size` is reached or
+    `max_wait_ms` has elapsed since the first one arrived. They are grouped by
+    `group_key` and each group is passed to `batch_fn` in one call on the
+    inference executor. A new batch is only collected once a worker is free,
+    so items keep accumulating while all workers are busy. At most
+    `max_pending` items may wait in the queue; beyond that `submit` raises
+    ExecutorOverloaded.
+    """
+
+    name = "batcher"
+
+    def __init__(
+        self,
+        executor: InferenceExecutor,
+        batch_fn: Callable[[list[Any]], list[Any]] | None,
+        max_batch_size: int = 16,
+        max_wait_ms: float = 10.0,
+        max_pending: int = 1024,
+    ):
+        self.executor = executor
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.stats = BatcherStats()
+        self._queue: asyncio.Queue[_Pending] = asyncio.Queue(maxsize=max_pending)
+        self._worker: asyncio.Task | None = None
+        self._inflight_batches: set[asyncio.Task] = set()
+        self._free_workers = asyncio.Semaphore(executor.max_workers)
+
+    def group_key(self, item: Any) -> Hashable:
+        return None
+
+    async def start(self) -> None:
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+            logger.info(
+                f"✅ {self.name} started (max_batch_size={self.max_batch_size}, max_wait_ms={self.max_wait_ms})"
+            )
+
+    async def stop(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        for task in list(self._inflight_batches):
+            task.cancel()
+        while not self._queue.empty():
+            pending = self._queue.get_nowait()
+            if not pending.future.done():
+                pending.future.cancel()
+
+    async def submit(self, item: Any) -> Any:
+        """
+        Queue an item and wait for its result.
+        :param item: One input of `batch_fn`.
+        :return: The matching output of `batch_fn`.
+        """
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait(_Pending(item=item, future=future))
+        except asyncio.QueueFull:
+            raise ExecutorOverloaded(f"{self.name} queue is full, try again later.")
+        return await future
+
+    async def _collect(self) -> list[_Pending]:
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            await self._free_workers.acquire()
+            batch = await self._collect()
+            groups: dict[Hashable, list[_Pending]] = defaultdict(list)
+            for pending in batch:
+                groups[self.group_key(pending.item)].append(pending)
+
+            for i, items in enumerate(groups.values()):
+                if i > 0:
+                    await self._free_workers.acquire()
+                task = asyncio.create_task(self._run_batch(items))
+                self._inflight_batches.add(task)
+                task.add_done_callback(self._inflight_batches.discard)
+
+    async def _execute(self, items: list[Any]) -> list[Any]:
+        return await self.executor.run(self.batch_fn, items)
+
+    async def _run_batch(self, items: list[_Pending]) -> None:
+        started = time.perf_counter()
+        self.stats.record(len(items), [(started - p.enqueued_at) * 1000 for p in items])
+        try:
+            # Spans of the shared batch call are copied into every request's trace
+            with tracing.capture() as captured:
+                results = await self._execute([p.item for p in items])
+        except Exception as e:
+            if not isinstance(e, ExecutorOverloaded):
+                logger.exception(f"🔥 {self.name} batch of {len(items)} failed: {e}")
+            for pending in items:
+                if not pending.future.done():
+                    pending.future.set_exception(e)
+            return
+        finally:
+            self._free_workers.release()
+
+        finished = time.perf_counter()
+        self.stats.record_latency([(finished - p.enqueued_at) * 1000 for p in items])
+        for pending in items:
+            if pending.trace is not None:
+                tracing.record("batch.queue_wait", pending.enqueued_at, started, trace=pending.trace)
+                for s in captured.spans:
+                    s.attrs.setdefault("batch_size", len(items))
+                    pending.trace.add(s)
+        for pending, result in zip(items, results):
+            if not pending.future.done():
+                pending.future.set_result(result)
+
+
+class ModelBatcher(MicroBatcher):
+    """
+    Micro-batcher whose batch function is a method of a registry model.
+
+    The model is resolved through the registry for every batch and pinned
+    while the batch runs, so it is never evicted mid-batch, and a model
+    unloaded between batches is reloaded within the registry's memory budget.
+    """
+
+    method = ""
+
+    def __init__(self, registry: ModelRegistry, model_key: str, executor: InferenceExecutor, **kwargs):
+        super().__init__(executor, None, **kwargs)
+        self.registry = registry
+        self.model_key = model_key
+
+    async def _execute(self, items: list[Any]) -> list[Any]:
+        async with self.registry.use(self.model_key) as model:
+            return await self.executor.run(getattr(model, self.method), items)
+
+
+class TranslationBatcher(ModelBatcher):
+    """
+    Micro-batcher in front of TextModel: requests are grouped by
+    (src_lang, tgt_lang) and translated with one padded `generate` call per group.
+    """
+
+    name = "Translation batcher"
+    method = "generate_batch"
+
+    def group_key(self, item: TextRequest) -> Hashable:
+        return item.src_lang, item.tgt_lang
+
+    async def submit(self, request: TextRequest) -> dict:
+        return await super().submit(request)
+
+
+class SpeechBatcher(ModelBatcher):
+    """
+    Micro-batcher in front of SpeechModel: concurrent clips (up to 30 s) get
+    their log-mel spectrograms stacked, go through the Whisper encoder as one
+    batch and are decoded together.
+    """
+
+    name = "Speech batcher"
+    method = "transcribe_batch"
+
+    async def submit(self, audio: np.ndarray) -> dict:
+        return await super().submit(audio)
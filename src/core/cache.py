@@ -0,0 +1,315 @@
+import asyncio
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+
+from logs.logger_factory import get_logger
+
+logger = get_logger("cache", "cache.log")
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """NFC-normalize and collapse whitespace so trivially different inputs share a cache entry."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+@dataclass
+class CacheStats:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+
+    def snapshot(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            **asdict(self),
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+
+
+class TranslationCache:
+    """
+    Two-tier translation cache.
+
+    Tier 1 is a bounded in-process LRU with TTL. Tier 2 is an optional SQLite
+    database (memory-mapped reads) that survives restarts. Entries are keyed on
+    the normalized text, language pair, model name, model version and generation
+    parameters, and can be dropped per model version with `invalidate`.
+
+    Disk reads run on a worker thread, and disk writes are buffered and committed
+    in batches by a background task (`start`), so the event loop never waits on
+    SQLite or fsync. The disk tier honours the same TTL and is capped at
+    `max_disk_entries` rows, oldest first.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10_000,
+        ttl_seconds: float = 3600.0,
+        sqlite_path: str | None = None,
+        model_version: str = "",
+        max_disk_entries: int = 100_000,
+        flush_interval_s: float = 1.0,
+        flush_batch_size: int = 256,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.model_version = model_version
+        self.max_disk_entries = max_disk_entries
+        self.flush_interval_s = flush_interval_s
+        self.flush_batch_size = flush_batch_size
+        self.stats = CacheStats()
+        self._memory: OrderedDict[str, tuple[float, str, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        # Rows waiting for the next batched commit: key -> (model_version, value, created_at)
+        self._pending: dict[str, tuple[str, str, float]] = {}
+        self._flush_requested = asyncio.Event()
+        self._flusher: asyncio.Task | None = None
+        self._db_lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        if sqlite_path:
+            self._db = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            # With WAL, NORMAL only syncs at checkpoints; a crash may lose the last commits, never corrupt.
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute("PRAGMA mmap_size=268435456")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                "key TEXT PRIMARY KEY, model_version TEXT NOT NULL, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_translations_version ON translations(model_version)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_translations_created ON translations(created_at)")
+            self._db.commit()
+            logger.info(f"✅ Translation cache disk tier at {sqlite_path}")
+
+    def make_key(
+        self, text: str, src_lang: str, tgt_lang: str, model_name: str, generation_params: dict | None = None
+    ) -> str:
+        payload = json.dumps(
+            [normalize_text(text), src_lang, tgt_lang, model_name, self.model_version, generation_params or {}],
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def start(self) -> None:
+        """Start the background task that commits buffered disk writes."""
+        if self._db is not None and self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, _, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.stats.memory_hits += 1
+                    return value
+                del self._memory[key]
+                self.stats.expirations += 1
+
+        if self._db is not None:
+            row = await asyncio.to_thread(self._get_disk, key, now)
+            if row is not None:
+                value, created_at = row
+                with self._lock:
+                    self.stats.disk_hits += 1
+                    self._put_memory(key, value, created_at)
+                return value
+
+        with self._lock:
+            self.stats.misses += 1
+        return None
+
+    async def put(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._put_memory(key, value, now)
+            if self._db is None:
+                return
+            self._pending[key] = (self.model_version, value, now)
+            if len(self._pending) >= self.flush_batch_size:
+                self._flush_requested.set()
+
+    def _get_disk(self, key: str, now: float) -> tuple[str, float] | None:
+        with self._lock:
+            pending = self._pending.get(key)
+        if pending is not None and pending[0] == self.model_version:
+            return pending[1], pending[2]
+        with self._db_lock:
+            if self._db is None:
+                return None
+            return self._db.execute(
+                "SELECT value, created_at FROM translations WHERE key = ? AND model_version = ? AND created_at > ?",
+                (key, self.model_version, now - self.ttl_seconds),
+            ).fetchone()
+
+    def _put_memory(self, key: str, value: str, created_at: float) -> None:
+        self._memory[key] = (created_at + self.ttl_seconds, self.model_version, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats.evictions += 1
+
+    async def _flush_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=self.flush_interval_s)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception as e:
+                logger.exception(f"🔥 Translation cache flush failed: {e}")
+
+    def flush(self) -> None:
+        """Commit buffered writes in one transaction, then drop expired rows and trim to the row cap."""
+        with self._db_lock:
+            if self._db is None:
+                return
+            # Taken under the database lock so a concurrent `invalidate` cannot be overwritten by stale rows
+            with self._lock:
+                rows = [(key, *row) for key, row in self._pending.items()]
+                self._pending.clear()
+            if rows:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO translations (key, model_version, value, created_at) VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+            expired = self._db.execute(
+                "DELETE FROM translations WHERE created_at <= ?", (time.time() - self.ttl_seconds,)
+            ).rowcount
+            overflow = self._db.execute("SELECT COUNT(*) FROM translations").fetchone()[0] - self.max_disk_entries
+            if overflow > 0:
+                self._db.execute(
+                    "DELETE FROM translations WHERE key IN "
+                    "(SELECT key FROM translations ORDER BY created_at LIMIT ?)",
+                    (overflow,),
+                )
+            self._db.commit()
+        with self._lock:
+            self.stats.expirations += expired
+            self.stats.evictions += max(overflow, 0)
+
+    def invalidate(self, model_version: str | None = None) -> int:
+        """
+        Drop cached translations produced by a model version.
+        Blocks on SQLite; call it from a worker thread.
+        :param model_version: Version to drop; all entries when None.
+        :return: Number of entries removed across both tiers.
+        """
+        with self._lock:
+            if model_version is None:
+                removed = len(self._memory)
+                self._memory.clear()
+                self._pending.clear()
+            else:
+                stale = [k for k, (_, version, _) in self._memory.items() if version == model_version]
+                for k in stale:
+                    del self._memory[k]
+                removed = len(stale)
+                for k in [k for k, (version, _, _) in self._pending.items() if version == model_version]:
+                    del self._pending[k]
+
+        with self._db_lock:
+            if self._db is not None:
+                if model_version is None:
+                    cursor = self._db.execute("DELETE FROM translations")
+                else:
+                    cursor = self._db.execute("DELETE FROM translations WHERE model_version = ?", (model_version,))
+                self._db.commit()
+                removed += cursor.rowcount
+
+        with self._lock:
+            self.stats.invalidations += removed
+        logger.info(f"🧹 Invalidated {removed} cached translations (model_version={model_version})")
+        return removed
+
+    async def close(self) -> None:
+        """Stop the flusher, commit what is still buffered and close the database."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        if self._db is not None:
+            await asyncio.to_thread(self.flush)
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+class ResponseCache:
+    """
+    Exact-match cache of chat completions.
+
+    Entries are keyed on the model name, its generation parameters and the
+    normalized conversation messages, kept in memory for `ttl_seconds` and bounded
+    to `max_entries` by LRU eviction.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 600.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.stats = CacheStats()
+        self._memory: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model_name: str, generation_params: dict, messages: list[tuple[str, str]]) -> str:
+        """
+        :param messages: (role, content) pairs of the conversation, oldest first.
+        """
+        payload = json.dumps(
+            [model_name, generation_params, [(role, normalize_text(content)) for role, content in messages]],
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.time():
+                    self._memory.move_to_end(key)
+                    self.stats.memory_hits += 1
+                    return value
+                del self._memory[key]
+                self.stats.expirations += 1
+            self.stats.misses += 1
+            return None
+
+    def put(self, key: str, value: str) -> None:
+        with self._lock:
+            self._memory[key] = (time.time() + self.ttl_seconds, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+                self.stats.evictions += 1
+
+    def clear(self) -> int:
+        with self._lock:
+            removed = len(self._memory)
+            self._memory.clear()
+            self.stats.invalidations += removed
+            return removed
@@ -0,0 +1,104 @@
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from collections.abc import Callable
+from typing import Any
+
+from core.metrics import EXECUTOR_IN_FLIGHT, EXECUTOR_QUEUE_DEPTH, MODEL_INFERENCE_SECONDS
+from logs import tracing
+from logs.logger_factory import get_logger
+
+logger = get_logger("executor", "executor.log")
+
+
+class ExecutorOverloaded(Exception):
+    """Raised when an inference executor's queue is full; map to HTTP 503."""
+    pass
+
+
+class InferenceExecutor:
+    """
+    Bounded worker pool for blocking model inference.
+
+    Calls run on a dedicated thread pool (PyTorch releases the GIL inside its
+    kernels), so the event loop only awaits results. At most `max_workers` calls
+    run at once and at most `max_queue` more may wait; anything beyond that is
+    rejected immediately with ExecutorOverloaded instead of piling up.
+    """
+
+    def __init__(self, name: str, max_workers: int = 1, max_queue: int = 32):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-inference")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        EXECUTOR_QUEUE_DEPTH.set_function(lambda: self.queue_depth, name)
+        EXECUTOR_IN_FLIGHT.set_function(lambda: self._in_flight, name)
+
+    @property
+    def queue_depth(self) -> int:
+        return self._pending - self._in_flight
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        if self._pending >= self.max_workers + self.max_queue:
+            self._rejected += 1
+            logger.warning(f"⚠️ Executor '{self.name}' overloaded ({self._pending} pending), rejecting request")
+            raise ExecutorOverloaded(f"Executor '{self.name}' is overloaded, try again later.")
+
+        self._pending += 1
+        # Copy the caller's context so tracing spans opened on the worker join its trace
+        context = contextvars.copy_context()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._pool, functools.partial(context.run, self._call, fn, *args, **kwargs)
+            )
+        finally:
+            self._pending -= 1
+
+    def _call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        with self._lock:
+            self._in_flight += 1
+        succeeded = False
+        started = time.perf_counter()
+        owner = getattr(fn, "__self__", None)
+        model = type(owner).__name__ if owner is not None else self.name
+        op = getattr(fn, "__name__", "call")
+        try:
+            with tracing.span(f"inference.{op}", model=model, executor=self.name):
+                result = fn(*args, **kwargs)
+            succeeded = True
+            return result
+        finally:
+            MODEL_INFERENCE_SECONDS.observe(time.perf_counter() - started, model, op)
+            with self._lock:
+                self._in_flight -= 1
+                if succeeded:
+                    self._completed += 1
+                else:
+                    self._failed += 1
+
+    def stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "queue_depth": self.queue_depth,
+            "in_flight": self._in_flight,
+            "completed": self._completed,
+            "failed": self._failed,
+            "rejected": self._rejected,
+        }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
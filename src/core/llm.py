@@ -1,12 +1,15 @@
 from functools import cache
+from urllib.parse import urlsplit
+import httpx
 from langchain_openai import AzureChatOpenAI, ChatOpenAI
 from logs.logger_factory import get_logger
-from schema.llamaCpp import ChatLlamaCpp
 import traceback
 
 logger = get_logger("llm", "llm.log")
 
 from core.settings import settings
+from core.upstream import PooledChatModel, UpstreamPool
+from schema.http import PoolStats, create_async_client, create_client
 from schema.models import (
     AllModelEnum,
     OpenAIModelName,
@@ -29,9 +32,62 @@ _MODEL_MAP: dict[AllModelEnum, type] = {
     LocalvLLMModelName.LLAMA_3_34B: "llama-3-34b",
     LocalvLLMModelName.LLAMA_32_3B_INSTRUCT: "llama-32-3B-instruct",
     LocalvLLMModelName.LLAMA_32_1B_INSTRUCT: "llama-32-1B-instruct",
-    LocalvLLMModelName.LLAMA_CPP_7B: "llama-cpp-7b"
 }
 
+_UPSTREAM_POOLS: dict[str, UpstreamPool] = {}
+_HTTP_POOLS: dict[str, tuple[PoolStats, httpx.Client, httpx.AsyncClient]] = {}
+
+
+def http_clients(base_url: str) -> dict:
+    """
+    Keep-alive httpx clients shared by every chat model talking to the host of `base_url`.
+    :return: `http_client` / `http_async_client` kwargs for ChatOpenAI.
+    """
+    host = urlsplit(base_url).netloc
+    if host not in _HTTP_POOLS:
+        options = {
+            "max_connections": settings.HTTP_MAX_CONNECTIONS_PER_HOST,
+            "max_keepalive": settings.HTTP_MAX_KEEPALIVE_PER_HOST,
+            "keepalive_expiry": settings.HTTP_KEEPALIVE_EXPIRY_S,
+            "http2": settings.HTTP2_ENABLED,
+            "timeout": httpx.Timeout(60.0, connect=5.0),
+        }
+        stats = PoolStats()
+        _HTTP_POOLS[host] = (stats, create_client(stats, **options), create_async_client(stats, **options))
+    _, client, async_client = _HTTP_POOLS[host]
+    return {"http_client": client, "http_async_client": async_client}
+
+
+def http_pool_stats() -> dict:
+    return {host: stats.snapshot() for host, (stats, _, _) in _HTTP_POOLS.items()}
+
+
+def get_upstream_pool(api_model_name: str) -> UpstreamPool:
+    """Upstream pool of a local model, from LLM_UPSTREAMS or the default endpoint list."""
+    if api_model_name not in _UPSTREAM_POOLS:
+        api_key = settings.VLLM_API_KEY.get_secret_value() if settings.VLLM_API_KEY else None
+        _UPSTREAM_POOLS[api_model_name] = UpstreamPool(
+            name=api_model_name,
+            base_urls=settings.LLM_UPSTREAMS.get(api_model_name, settings.LLM_DEFAULT_UPSTREAMS),
+            api_key=api_key,
+            eject_after=settings.LLM_UPSTREAM_EJECT_AFTER,
+            eject_seconds=settings.LLM_UPSTREAM_EJECT_SECONDS,
+            health_interval_s=settings.LLM_UPSTREAM_HEALTH_INTERVAL_S,
+            http_client=lambda base_url: http_clients(base_url)["http_async_client"],
+        )
+    return _UPSTREAM_POOLS[api_model_name]
+
+
+def upstream_stats() -> dict:
+    return {name: pool.stats() for name, pool in _UPSTREAM_POOLS.items()}
+
+
+async def close_upstream_pools() -> None:
+    """Stop the health checks of every upstream pool (lifespan teardown)."""
+    for pool in _UPSTREAM_POOLS.values():
+        await pool.close()
+
+
 @cache
 def get_model(model_name: str | AllModelEnum):
     """
@@ -62,7 +118,12 @@ def get_model(model_name: str | AllModelEnum):
             return None
 
         if model_name in OpenAIModelName:
-            return ChatOpenAI(model=api_model_name, temperature=0.5, streaming=True)
+            return ChatOpenAI(
+                model=api_model_name,
+                temperature=0.5,
+                streaming=True,
+                **http_clients("https://api.openai.com/v1"),
+            )
 
         if model_name in AzureOpenAIModelName:
             if not settings.AZURE_OPENAI_API_KEY or not settings.AZURE_OPENAI_ENDPOINT:
@@ -77,6 +138,7 @@ def get_model(model_name: str | AllModelEnum):
                 streaming=True,
                 timeout=60,
                 max_retries=3,
+                **http_clients(settings.AZURE_OPENAI_ENDPOINT),
             )
 
         if model_name in DeepseekModelName:
@@ -86,6 +148,7 @@ def get_model(model_name: str | AllModelEnum):
                 streaming=True,
                 openai_api_base="https://api.deepseek.com",
                 openai_api_key=settings.DEEPSEEK_API_KEY,
+                **http_clients("https://api.deepseek.com"),
             )
 
         # if model_name in HuggingFaceModelName:
@@ -102,12 +165,21 @@ def get_model(model_name: str | AllModelEnum):
         #     return ChatHuggingFace(llm=llm)
 
         if model_name in LocalvLLMModelName:
-            return ChatOpenAI(
-                model=api_model_name,
-                temperature=0.5,
-                streaming=True,
-                openai_api_base="http://vllm:8001/v1",
-                openai_api_key=settings.VLLM_API_KEY,
+            pool = get_upstream_pool(api_model_name)
+            return PooledChatModel(
+                pool=pool,
+                models={
+                    upstream.base_url: ChatOpenAI(
+                        model=api_model_name,
+                        temperature=0.5,
+                        streaming=True,
+                        openai_api_base=upstream.base_url,
+                        openai_api_key=settings.VLLM_API_KEY,
+                        max_retries=0,  # failover to another upstream instead
+                        **http_clients(upstream.base_url),
+                    )
+                    for upstream in pool.upstreams
+                },
             )
         
     except Exception as e:
@@ -0,0 +1,136 @@
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable
+
+import numpy as np
+
+from core.metrics import AUDIO_SECONDS
+from schema.audio import SAMPLE_RATE, pcm16_to_float32
+from logs.logger_factory import get_logger
+
+logger = get_logger("longform", "longform.log")
+
+_FFMPEG_PCM_ARGS = ["-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(SAMPLE_RATE), "pipe:1"]
+
+
+async def iter_audio_windows(
+    chunks: AsyncIterator[bytes], window_s: float = 30.0, overlap_s: float = 2.0
+) -> AsyncIterator[tuple[float, np.ndarray]]:
+    """
+    Decode an encoded audio stream incrementally into overlapping windows.
+
+    Encoded chunks are fed to ffmpeg's stdin while 16 kHz PCM is read back from
+    its stdout one window at a time, so at most one window of decoded audio is
+    held here regardless of file length. Back-pressure from a slow consumer
+    propagates through the pipes to the producer.
+    :param chunks: Encoded audio bytes, e.g. read from an upload in fixed-size pieces.
+    :param window_s: Window length in seconds.
+    :param overlap_s: Overlap between consecutive windows in seconds.
+    :return: (start_seconds, waveform) pairs in order.
+    """
+    window = int(window_s * SAMPLE_RATE)
+    hop = window - int(overlap_s * SAMPLE_RATE)
+    process = await asyncio.create_subprocess_exec(
+        "ffmpeg", "-nostdin", "-threads", "0", "-i", "pipe:0", *_FFMPEG_PCM_ARGS,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+
+    async def feed() -> None:
+        try:
+            async for chunk in chunks:
+                process.stdin.write(chunk)
+                await process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            process.stdin.close()
+
+    feeder = asyncio.create_task(feed())
+    try:
+        buffer = np.zeros(0, dtype=np.float32)
+        start_sample = 0
+        eof = False
+        while not eof:
+            needed = window - len(buffer)
+            try:
+                pcm = await process.stdout.readexactly(needed * 2)
+            except asyncio.IncompleteReadError as e:
+                pcm, eof = e.partial, True
+            AUDIO_SECONDS.inc(len(pcm) / 2 / SAMPLE_RATE)
+            buffer = np.concatenate([buffer, pcm16_to_float32(pcm)])
+            if len(buffer) == 0 or (eof and start_sample > 0 and len(buffer) <= window - hop):
+                break  # nothing beyond what the previous window already covered
+            yield start_sample / SAMPLE_RATE, buffer
+            buffer = buffer[hop:].copy()
+            start_sample += hop
+        await feeder
+    finally:
+        feeder.cancel()
+        if process.returncode is None:
+            process.kill()
+        await process.wait()
+
+
+async def transcribe_windows(
+    windows: AsyncIterator[tuple[float, np.ndarray]],
+    transcribe: Callable[[np.ndarray], Awaitable[dict]],
+    window_s: float = 30.0,
+    overlap_s: float = 2.0,
+    max_inflight: int = 2,
+) -> AsyncIterator[dict]:
+    """
+    Transcribe windows concurrently and yield stitched segments in time order.
+
+    Up to `max_inflight` windows are transcribed at once, which also bounds how
+    much decoded audio is alive. Segment timestamps are shifted by their window
+    start. In the overlap between two windows, a segment is kept by the window
+    whose non-overlapping half contains its midpoint, so nothing is emitted twice.
+    :param transcribe: Coroutine returning a whisper-style result with "segments".
+    :return: {"start", "end", "text", "language"} dicts in order.
+    """
+    half_overlap = overlap_s / 2
+    inflight: asyncio.Queue[tuple[float, asyncio.Task] | None] = asyncio.Queue(maxsize=max_inflight)
+
+    async def produce() -> None:
+        try:
+            async for start, audio in windows:
+                await inflight.put((start, asyncio.ensure_future(transcribe(audio))))
+        finally:
+            await inflight.put(None)
+
+    producer = asyncio.create_task(produce())
+    pending: list[tuple[float, asyncio.Task]] = []
+    try:
+        previous: tuple[float, asyncio.Task] | None = None
+        while (item := await inflight.get()) is not None:
+            pending.append(item)
+            if previous is not None:
+                async for segment in _window_segments(previous, False, window_s, half_overlap):
+                    yield segment
+                pending.remove(previous)
+            previous = item
+        if previous is not None:
+            async for segment in _window_segments(previous, True, window_s, half_overlap):
+                yield segment
+            pending.remove(previous)
+        await producer
+    finally:
+        producer.cancel()
+        for _, task in pending:
+            task.cancel()
+
+
+async def _window_segments(item: tuple[float, asyncio.Task], is_last: bool, window_s: float, half_overlap: float):
+    start, task = item
+    result = await task
+    lower = start + half_overlap if start > 0 else 0.0
+    upper = start + window_s - half_overlap
+    for segment in result.get("segments", []):
+        seg_start, seg_end = start + segment["start"], start + segment["end"]
+        midpoint = (seg_start + seg_end) / 2
+        if midpoint < lower or (not is_last and midpoint >= upper):
+            continue
+        text = segment["text"].strip()
+        if text:
+            yield {"start": round(seg_start, 2), "end": round(seg_end, 2), "text": text, "language": result.get("language")}
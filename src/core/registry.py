@@ -0,0 +1,179 @@
+import asyncio
+import gc
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+from core.metrics import MODEL_LOAD_SECONDS, MODEL_RESIDENT_BYTES
+from schema.base import BaseModelWrapper
+from logs.logger_factory import get_logger
+
+logger = get_logger("registry", "registry.log")
+
+try:
+    import psutil
+except ImportError:  # optional: resident memory falls back to tensor sizes only
+    psutil = None
+
+
+def _rss_bytes() -> int:
+    return psutil.Process().memory_info().rss if psutil is not None else 0
+
+
+def _tensor_bytes(wrapper: BaseModelWrapper) -> int:
+    """Bytes held by the parameters and buffers of a wrapper's torch module, 0 if it has none."""
+    model = wrapper.model
+    if model is None or not hasattr(model, "parameters"):
+        return 0
+    total = sum(p.numel() * p.element_size() for p in model.parameters())
+    if hasattr(model, "buffers"):
+        total += sum(b.numel() * b.element_size() for b in model.buffers())
+    return total
+
+
+@dataclass
+class _Entry:
+    wrapper: BaseModelWrapper
+    warmup: bool
+    resident_bytes: int = 0
+    load_seconds: float = 0.0
+    loads: int = 0
+    last_used: float = 0.0
+    # Callers inside `use`; a pinned model is never evicted
+    pins: int = 0
+
+
+class ModelRegistry:
+    """
+    Central owner of model lifecycles.
+
+    Models are registered once by key (e.g. "whisper:base", "mbart:<path>") and
+    loaded on first use or at startup, followed by an optional warm-up inference.
+    The resident memory of each loaded model is tracked; when the total exceeds
+    `memory_budget_mb`, least-recently-used models are unloaded, except those
+    pinned by `use` (by a batcher while it runs a batch, or by a request for as
+    long as its job or stream runs). An unloaded wrapper stays registered and
+    is loaded again on its next use.
+    """
+
+    def __init__(self, memory_budget_mb: float | None = None):
+        self.memory_budget_bytes = int(memory_budget_mb * 1024 * 1024) if memory_budget_mb else None
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    def register(self, key: str, wrapper: BaseModelWrapper, warmup: bool = True) -> BaseModelWrapper:
+        if key in self._entries:
+            return self._entries[key].wrapper
+        self._entries[key] = _Entry(wrapper=wrapper, warmup=warmup)
+        self._locks[key] = asyncio.Lock()
+        logger.info(f"📝 Registered model '{key}': {wrapper}")
+        return wrapper
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def peek(self, key: str) -> BaseModelWrapper:
+        """Return a registered wrapper without loading it."""
+        return self._entries[key].wrapper
+
+    async def get(self, key: str) -> BaseModelWrapper:
+        """
+        Return a registered model, loading (and warming up) its weights if needed.
+        :param key: Registry key.
+        :return: The model wrapper, loaded.
+        """
+        return await self._acquire(key, pin=False)
+
+    @asynccontextmanager
+    async def use(self, key: str) -> AsyncIterator[BaseModelWrapper]:
+        """
+        Load a model like `get` and pin it for the duration of the block, so
+        budget enforcement cannot unload it while it is running on a worker.
+        """
+        wrapper = await self._acquire(key, pin=True)
+        try:
+            yield wrapper
+        finally:
+            self._entries[key].pins -= 1
+
+    async def _acquire(self, key: str, pin: bool) -> BaseModelWrapper:
+        entry = self._entries[key]
+        async with self._locks[key]:
+            if not entry.wrapper.is_loaded() or entry.loads == 0:
+                await asyncio.to_thread(self._load, key, entry)
+            elif entry.resident_bytes == 0:
+                # Reloaded lazily by a worker after an eviction; account for it again.
+                entry.resident_bytes = _tensor_bytes(entry.wrapper)
+            entry.last_used = time.monotonic()
+            entry.pins += pin
+            self._entries.move_to_end(key)
+        await self._enforce_budget(keep=key)
+        return entry.wrapper
+
+    async def preload(self, keys: list[str] | None = None) -> None:
+        for key in keys or list(self._entries):
+            await self.get(key)
+
+    def _load(self, key: str, entry: _Entry) -> None:
+        started = time.perf_counter()
+        rss_before = _rss_bytes()
+        entry.wrapper.__load_model__()
+        if entry.warmup:
+            entry.wrapper.warmup()
+        entry.load_seconds = time.perf_counter() - started
+        entry.resident_bytes = _tensor_bytes(entry.wrapper) or max(_rss_bytes() - rss_before, 0)
+        entry.loads += 1
+        MODEL_LOAD_SECONDS.set(entry.load_seconds, key)
+        MODEL_RESIDENT_BYTES.set(entry.resident_bytes, key)
+        logger.info(
+            f"✅ Loaded '{key}' in {entry.load_seconds:.1f}s ({entry.resident_bytes / 2**20:.0f} MiB resident)"
+        )
+
+    def unload(self, key: str) -> None:
+        entry = self._entries[key]
+        if entry.wrapper.is_loaded():
+            entry.wrapper.unload()
+            freed, entry.resident_bytes = entry.resident_bytes, 0
+            MODEL_RESIDENT_BYTES.set(0, key)
+            gc.collect()
+            logger.info(f"♻️ Unloaded '{key}' ({freed / 2**20:.0f} MiB)")
+
+    def resident_bytes(self) -> int:
+        return sum(e.resident_bytes for e in self._entries.values() if e.wrapper.is_loaded())
+
+    async def _enforce_budget(self, keep: str) -> None:
+        if self.memory_budget_bytes is None:
+            return
+        for key in list(self._entries):  # least recently used first
+            if self.resident_bytes() <= self.memory_budget_bytes:
+                break
+            entry = self._entries[key]
+            if key == keep or entry.pins or not entry.wrapper.is_loaded():
+                continue
+            async with self._locks[key]:
+                if not entry.pins:
+                    self.unload(key)
+        if self.resident_bytes() > self.memory_budget_bytes:
+            logger.warning(
+                f"⚠️ Model memory {self.resident_bytes() / 2**20:.0f} MiB exceeds budget "
+                f"{self.memory_budget_bytes / 2**20:.0f} MiB after evicting least-recently-used models"
+            )
+
+    def stats(self) -> dict:
+        return {
+            "memory_budget_mb": self.memory_budget_bytes / 2**20 if self.memory_budget_bytes else None,
+            "resident_mb": self.resident_bytes() / 2**20,
+            "models": {
+                key: {
+                    "model": str(entry.wrapper),
+                    "loaded": entry.wrapper.is_loaded(),
+                    "resident_mb": entry.resident_bytes / 2**20,
+                    "load_seconds": entry.load_seconds,
+                    "loads": entry.loads,
+                    "in_use": entry.pins,
+                }
+                for key, entry in self._entries.items()
+            },
+        }
@@ -0,0 +1,111 @@
+import re
+from collections.abc import Callable
+from dataclasses import dataclass
+
+# Sentence end: Latin/CJK terminal punctuation, optionally followed by closing quotes/brackets.
+_SENTENCE_END = re.compile(r"(?<=[.!?。！？…])[\"'”’)\]]*\s+|(?<=[。！？])")
+_PARAGRAPH_BREAK = re.compile(r"(\n\s*\n)")
+
+
+@dataclass
+class Chunk:
+    """A piece of a document to translate, with the whitespace that followed it in the source."""
+
+    text: str
+    separator: str = " "
+
+
+def split_sentences(paragraph: str) -> list[str]:
+    return [s.strip() for s in _SENTENCE_END.split(paragraph) if s and s.strip()]
+
+
+def split_document(
+    text: str,
+    max_tokens: int = 200,
+    count_tokens: Callable[[str], int] = lambda s: len(s.split()),
+    split_long: Callable[[str, int], list[str]] | None = None,
+) -> list[Chunk]:
+    """
+    Split a document into translation chunks.
+
+    Paragraph boundaries are always kept. Inside a paragraph, consecutive sentences
+    are packed together while they fit in `max_tokens`; a single sentence longer
+    than the budget is cut into pieces so no chunk exceeds the model window.
+    :param text: The document.
+    :param max_tokens: Token budget per chunk.
+    :param count_tokens: Token counter, e.g. based on the model tokenizer.
+    :param split_long: Cuts an oversize sentence into pieces of at most `max_tokens`
+        tokens, e.g. `TextModel.split_long`, which tokenizes it once. By default
+        it is cut on whitespace, or into character runs when it has none.
+    :return: Chunks in document order.
+    """
+    chunks: list[Chunk] = []
+    parts = _PARAGRAPH_BREAK.split(text)
+    for i in range(0, len(parts), 2):
+        paragraph = parts[i]
+        paragraph_break = parts[i + 1] if i + 1 < len(parts) else ""
+        paragraph_chunks: list[str] = []
+        current: list[str] = []
+        current_tokens = 0
+
+        for sentence in split_sentences(paragraph):
+            tokens = count_tokens(sentence)
+            if tokens <= max_tokens:
+                pieces = [(sentence, tokens)]
+            else:
+                cut = split_long or (lambda s, n: _split_long(s, n, count_tokens))
+                pieces = [(piece, count_tokens(piece)) for piece in cut(sentence, max_tokens)]
+            for piece, tokens in pieces:
+                if current and current_tokens + tokens > max_tokens:
+                    paragraph_chunks.append(" ".join(current))
+                    current, current_tokens = [], 0
+                current.append(piece)
+                current_tokens += tokens
+        if current:
+            paragraph_chunks.append(" ".join(current))
+
+        if not paragraph_chunks:
+            if chunks and paragraph_break:
+                chunks[-1].separator += paragraph_break
+            continue
+        chunks.extend(Chunk(text=c) for c in paragraph_chunks)
+        chunks[-1].separator = paragraph_break or " "
+
+    if chunks:
+        chunks[-1].separator = ""
+    return chunks
+
+
+def _split_long(sentence: str, max_tokens: int, count_tokens: Callable[[str], int]) -> list[str]:
+    """Cut on whitespace, counting each word once; a word over the budget is cut into character runs."""
+    pieces: list[str] = []
+    current: list[str] = []
+    current_tokens = 0
+    for word in sentence.split():
+        tokens = count_tokens(word)
+        if current and current_tokens + tokens > max_tokens:
+            pieces.append(" ".join(current))
+            current, current_tokens = [], 0
+        if tokens > max_tokens:
+            # No whitespace to cut on, e.g. Chinese, Japanese or Thai
+            pieces.extend(_split_chars(word, max_tokens, tokens, count_tokens))
+            continue
+        current.append(word)
+        current_tokens += tokens
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+def _split_chars(text: str, max_tokens: int, tokens: int, count_tokens: Callable[[str], int]) -> list[str]:
+    # Runs are sized from the text's average characters per token, then shrunk until they fit
+    step = max(len(text) * max_tokens // tokens, 1)
+    pieces: list[str] = []
+    start = 0
+    while start < len(text):
+        end = min(start + step, len(text))
+        while end - start > 1 and count_tokens(text[start:end]) > max_tokens:
+            end = start + max((end - start) * 9 // 10, 1)
+        pieces.append(text[start:end])
+        start = end
+    return pieces
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import SecretStr, Field
+from typing import Literal
 from schema.models import OpenAIModelName
 
 class Settings(BaseSettings):
@@ -33,6 +34,101 @@ class Settings(BaseSettings):
     POSTGRES_PORT: int | None = None
     POSTGRES_DB: str | None = None
 
+    # Model registry: "lazy" loads on first use, "startup" preloads in the lifespan
+    MODEL_LOAD_MODE: Literal["lazy", "startup"] = "lazy"
+    MODEL_WARMUP: bool = True
+    MODEL_MEMORY_BUDGET_MB: float | None = None
+    # Whisper sizes to register; the first one serves the default endpoints
+    SPEECH_MODEL_NAMES: list[str] = ["base"]
+
+    # Inference worker pools: threads per model and bounded wait queue (overflow -> 503)
+    TEXT_EXECUTOR_WORKERS: int = 1
+    TEXT_EXECUTOR_QUEUE: int = 16
+    SPEECH_EXECUTOR_WORKERS: int = 1
+    SPEECH_EXECUTOR_QUEUE: int = 8
+
+    # Text translation backend: fp32 PyTorch or int8 ONNX Runtime (see tools/export_onnx.py)
+    TEXT_MODEL_BACKEND: Literal["torch", "onnx"] = "torch"
+    # Local MBart checkpoint for the torch backend, e.g. a reduced-vocabulary build (tools/prune_vocab.py)
+    TEXT_MODEL_PATH: str | None = None
+    TEXT_ONNX_MODEL_DIR: str = "models/mbart-50-onnx-int8"
+    TEXT_ONNX_NUM_THREADS: int | None = None
+
+    # Text translation micro-batching
+    TEXT_BATCH_MAX_SIZE: int = 16
+    TEXT_BATCH_MAX_WAIT_MS: float = 10.0
+    TEXT_BATCH_MAX_PENDING: int = 1024
+    # Bulk translation: max segments per length bucket
+    TEXT_BUCKET_SIZE: int = 32
+    # Translation cache (in-memory LRU + optional SQLite tier)
+    TRANSLATION_CACHE_ENABLED: bool = True
+    TRANSLATION_CACHE_MAX_ENTRIES: int = 10_000
+    TRANSLATION_CACHE_TTL_SECONDS: float = 3600.0
+    TRANSLATION_CACHE_SQLITE_PATH: str | None = None
+    TRANSLATION_CACHE_DISK_MAX_ENTRIES: int = 100_000
+    # Disk writes are committed in batches: every interval, or sooner once this many are buffered
+    TRANSLATION_CACHE_FLUSH_INTERVAL_S: float = 1.0
+    TRANSLATION_CACHE_FLUSH_BATCH: int = 256
+    TEXT_MODEL_VERSION: str = "1"
+    # Document mode: token budget per translated chunk (MBart window is 1024)
+    DOCUMENT_CHUNK_MAX_TOKENS: int = 200
+
+    # Whisper cross-request batching (clips up to 30 s)
+    SPEECH_BATCH_MAX_SIZE: int = 8
+    SPEECH_BATCH_MAX_WAIT_MS: float = 50.0
+    SPEECH_BATCH_MAX_PENDING: int = 64
+
+    # Long-audio mode: overlapping windows transcribed in parallel
+    LONG_AUDIO_WINDOW_S: float = 30.0
+    LONG_AUDIO_OVERLAP_S: float = 2.0
+    LONG_AUDIO_READ_CHUNK_BYTES: int = 1 << 20
+
+    # Real-time speech recognition (WebSocket): voice-activity segmentation
+    STREAM_VAD_ENERGY_THRESHOLD: float = 0.01
+    STREAM_VAD_SILENCE_MS: int = 500
+    STREAM_MAX_SEGMENT_S: float = 15.0
+    STREAM_PARTIAL_INTERVAL_S: float = 1.0
+
+    # Chat memory: recent turns within a token budget, older turns in a rolling summary.
+    # Sized for the smallest local context (llama.cpp n_ctx=1024) minus room for the reply.
+    CHAT_MEMORY_TOKEN_BUDGET: int = 640
+    CHAT_SUMMARY_MAX_WORDS: int = 150
+    # After summarizing, recent turns are trimmed to this fraction of the budget so later turns need no LLM call
+    CHAT_SUMMARY_LOW_WATER: float = 0.5
+
+    # Exact-match chat response cache (opt-in); bypass per request with agent_config={"cache": false}
+    CHAT_CACHE_ENABLED: bool = False
+    CHAT_CACHE_MAX_ENTRIES: int = 1000
+    CHAT_CACHE_TTL_SECONDS: float = 600.0
+
+    # Agent thread checkpoints: SQLite locally, Postgres (POSTGRES_*) in production
+    CHECKPOINTER_BACKEND: Literal["memory", "sqlite", "postgres"] = "sqlite"
+    CHECKPOINTER_SQLITE_PATH: str = "checkpoints.sqlite"
+    CHECKPOINTER_POOL_MIN_SIZE: int = 1
+    CHECKPOINTER_POOL_MAX_SIZE: int = 10
+    CHECKPOINT_CACHE_MAX_THREADS: int = 256
+    CHECKPOINT_CACHE_IDLE_SECONDS: float = 900.0
+
+    # Chat SSE: tokens are coalesced into one frame per window or size limit
+    SSE_FLUSH_MS: float = 30.0
+    SSE_FLUSH_BYTES: int = 512
+
+    # Local LLM upstreams: OpenAI-compatible base URLs per model name (e.g. vLLM / llama.cpp replicas)
+    LLM_DEFAULT_UPSTREAMS: list[str] = ["http://vllm:8001/v1"]
+    LLM_UPSTREAMS: dict[str, list[str]] = Field(default_factory=dict)
+    LLM_UPSTREAM_EJECT_AFTER: int = 3
+    LLM_UPSTREAM_EJECT_SECONDS: float = 30.0
+    LLM_UPSTREAM_HEALTH_INTERVAL_S: float = 10.0
+
+    # Keep-alive HTTP pools shared by the chat model clients, one per host
+    HTTP_MAX_CONNECTIONS_PER_HOST: int = 20
+    HTTP_MAX_KEEPALIVE_PER_HOST: int = 10
+    HTTP_KEEPALIVE_EXPIRY_S: float = 30.0
+    HTTP2_ENABLED: bool = True
+
+    # Request tracing to log_dirs/traces.jsonl; `?trace=1` traces one request and adds a Server-Timing header
+    TRACING_ENABLED: bool = False
+
     DEFAULT_MODEL: OpenAIModelName = OpenAIModelName.GPT_4O_MINI
 
 settings = Settings()
\ No newline at end of file
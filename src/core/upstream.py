@@ -0,0 +1,299 @@
+import asyncio
+import threading
+import time
+from collections.abc import AsyncIterator, Callable, Iterator
+from dataclasses import dataclass
+from typing import Any
+
+import httpx
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import ConfigDict
+
+from logs.logger_factory import get_logger
+
+logger = get_logger("upstream", "llm.log")
+
+# Inner calls run without the caller's callbacks; the pooled model reports tokens itself.
+_NO_CALLBACKS = {"callbacks": []}
+
+
+@dataclass
+class Upstream:
+    """One OpenAI-compatible endpoint and its running counters."""
+
+    base_url: str
+    outstanding: int = 0
+    requests: int = 0
+    errors: int = 0
+    failovers: int = 0
+    consecutive_errors: int = 0
+    healthy: bool = True
+    ejected_until: float = 0.0
+    total_latency_s: float = 0.0
+    total_ttft_s: float = 0.0
+    last_error: str | None = None
+
+    def available(self, now: float) -> bool:
+        return self.healthy and self.ejected_until <= now
+
+    def snapshot(self) -> dict:
+        completed = self.requests - self.errors - self.outstanding
+        return {
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "errors": self.errors,
+            "failovers": self.failovers,
+            "healthy": self.healthy,
+            "ejected": self.ejected_until > time.monotonic(),
+            "avg_latency_ms": self.total_latency_s * 1000 / completed if completed > 0 else 0.0,
+            "avg_ttft_ms": self.total_ttft_s * 1000 / completed if completed > 0 else 0.0,
+            "last_error": self.last_error,
+        }
+
+
+class UpstreamPool:
+    """
+    Replicas serving one model behind OpenAI-compatible APIs (vLLM, llama.cpp).
+
+    Requests go to the available upstream with the fewest outstanding
+    requests. An upstream is ejected for `eject_seconds` after `eject_after`
+    consecutive errors (passive), and marked unhealthy while its `/models`
+    endpoint does not answer (active, every `health_interval_s`). A passing
+    probe never cuts an ejection short; it only re-admits an upstream once its
+    ejection has expired. When every upstream is out, the least loaded one is
+    tried anyway rather than failing. Counters are guarded by a lock, since
+    sync calls pick and release upstreams from worker threads. Probes go
+    through `http_client(base_url)`, the shared per-host client, when given.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        base_urls: list[str],
+        api_key: str | None = None,
+        eject_after: int = 3,
+        eject_seconds: float = 30.0,
+        health_interval_s: float = 10.0,
+        http_client: Callable[[str], httpx.AsyncClient] | None = None,
+    ):
+        if not base_urls:
+            raise ValueError(f"Upstream pool '{name}' has no base URLs")
+        self.name = name
+        self.upstreams = [Upstream(base_url=url.rstrip("/")) for url in base_urls]
+        self.api_key = api_key
+        self.eject_after = eject_after
+        self.eject_seconds = eject_seconds
+        self.health_interval_s = health_interval_s
+        self.http_client = http_client
+        self._health_task: asyncio.Task | None = None
+        self._lock = threading.Lock()
+
+    def acquire(self, exclude: set[str] = frozenset()) -> Upstream | None:
+        """Pick the least-loaded upstream not in `exclude` and count it as outstanding."""
+        self._ensure_health_checks()
+        now = time.monotonic()
+        with self._lock:
+            candidates = [u for u in self.upstreams if u.base_url not in exclude]
+            if not candidates:
+                return None
+            available = [u for u in candidates if u.available(now)] or candidates
+            upstream = min(available, key=lambda u: u.outstanding)
+            upstream.outstanding += 1
+            upstream.requests += 1
+            return upstream
+
+    def release(
+        self,
+        upstream: Upstream,
+        error: Exception | None = None,
+        latency_s: float = 0.0,
+        ttft_s: float = 0.0,
+        failover: bool = False,
+    ) -> None:
+        """
+        :param failover: The call failed and will be retried on another upstream.
+        """
+        with self._lock:
+            upstream.outstanding -= 1
+            if error is None:
+                upstream.consecutive_errors = 0
+                upstream.total_latency_s += latency_s
+                upstream.total_ttft_s += ttft_s
+                return
+            upstream.errors += 1
+            upstream.failovers += failover
+            upstream.consecutive_errors += 1
+            upstream.last_error = f"{type(error).__name__}: {error}"
+            if upstream.consecutive_errors < self.eject_after:
+                return
+            upstream.ejected_until = time.monotonic() + self.eject_seconds
+        logger.warning(
+            f"⚠️ Ejected {upstream.base_url} from '{self.name}' for {self.eject_seconds:.0f}s "
+            f"after {upstream.consecutive_errors} errors: {upstream.last_error}"
+        )
+
+    def _ensure_health_checks(self) -> None:
+        if self._health_task is not None or self.health_interval_s <= 0:
+            return
+        try:
+            self._health_task = asyncio.get_running_loop().create_task(self._health_loop())
+        except RuntimeError:
+            pass  # no running loop (sync call); checks start with the first async request
+
+    async def _health_loop(self) -> None:
+        if self.http_client is not None:
+            return await self._probe_forever(self.http_client)
+        async with httpx.AsyncClient() as client:
+            await self._probe_forever(lambda _: client)
+
+    async def _probe_forever(self, client_for: Callable[[str], httpx.AsyncClient]) -> None:
+        while True:
+            await asyncio.gather(*(self._check(client_for(u.base_url), u) for u in self.upstreams))
+            await asyncio.sleep(self.health_interval_s)
+
+    async def _check(self, client: httpx.AsyncClient, upstream: Upstream) -> None:
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        try:
+            response = await client.get(f"{upstream.base_url}/models", headers=headers, timeout=5.0)
+            healthy = response.status_code < 500
+        except httpx.HTTPError:
+            healthy = False
+        if healthy != upstream.healthy:
+            logger.info(f"{'✅' if healthy else '❌'} {upstream.base_url} ({self.name}) is {'up' if healthy else 'down'}")
+        with self._lock:
+            upstream.healthy = healthy
+            # /models can answer while completions fail; only re-admit once the ejection has run out
+            if healthy and upstream.ejected_until and upstream.ejected_until <= time.monotonic():
+                upstream.ejected_until = 0.0
+                upstream.consecutive_errors = 0
+
+    async def close(self) -> None:
+        """Stop the active health checks."""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {u.base_url: u.snapshot() for u in self.upstreams}
+
+
+class PooledChatModel(BaseChatModel):
+    """
+    Chat model that sends each call to one upstream of an UpstreamPool.
+
+    `models` holds one client per upstream base URL. If an upstream fails
+    before the first token arrives, the call is retried on the next
+    least-loaded upstream; once tokens have been streamed, errors propagate.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    pool: UpstreamPool
+    models: dict[str, BaseChatModel]
+
+    @property
+    def _llm_type(self) -> str:
+        return "pooled-chat-model"
+
+    @property
+    def _identifying_params(self) -> dict[str, Any]:
+        first = next(iter(self.models.values()))
+        return {"pool": self.pool.name, **getattr(first, "_identifying_params", {})}
+
+    def _attempts(self) -> Iterator[Upstream]:
+        tried: set[str] = set()
+        while (upstream := self.pool.acquire(exclude=tried)) is not None:
+            tried.add(upstream.base_url)
+            yield upstream
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        error: Exception | None = None
+        for upstream in self._attempts():
+            started = time.perf_counter()
+            try:
+                message = self.models[upstream.base_url].invoke(messages, config=_NO_CALLBACKS, stop=stop, **kwargs)
+            except Exception as e:
+                self.pool.release(upstream, error=e, failover=True)
+                error = e
+                continue
+            elapsed = time.perf_counter() - started
+            self.pool.release(upstream, latency_s=elapsed, ttft_s=elapsed)
+            return ChatResult(generations=[ChatGeneration(message=message)])
+        raise error or RuntimeError(f"No upstream available for '{self.pool.name}'")
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        error: Exception | None = None
+        for upstream in self._attempts():
+            started = time.perf_counter()
+            try:
+                message = await self.models[upstream.base_url].ainvoke(
+                    messages, config=_NO_CALLBACKS, stop=stop, **kwargs
+                )
+            except asyncio.CancelledError:
+                self.pool.release(upstream)
+                raise
+            except Exception as e:
+                self.pool.release(upstream, error=e, failover=True)
+                error = e
+                logger.warning(f"⚠️ {upstream.base_url} failed, failing over: {e}")
+                continue
+            elapsed = time.perf_counter() - started
+            self.pool.release(upstream, latency_s=elapsed, ttft_s=elapsed)
+            return ChatResult(generations=[ChatGeneration(message=message)])
+        raise error or RuntimeError(f"No upstream available for '{self.pool.name}'")
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        error: Exception | None = None
+        for upstream in self._attempts():
+            started = time.perf_counter()
+            ttft = 0.0
+            first = True
+            try:
+                async for message in self.models[upstream.base_url].astream(
+                    messages, config=_NO_CALLBACKS, stop=stop, **kwargs
+                ):
+                    if first:
+                        ttft, first = time.perf_counter() - started, False
+                    chunk = ChatGenerationChunk(message=message)
+                    if run_manager:
+                        await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                    yield chunk
+            except (asyncio.CancelledError, GeneratorExit):
+                self.pool.release(upstream)
+                raise
+            except Exception as e:
+                self.pool.release(upstream, error=e, failover=first)
+                if not first:
+                    raise  # tokens already reached the caller; cannot switch upstream now
+                error = e
+                logger.warning(f"⚠️ {upstream.base_url} failed before first token, failing over: {e}")
+                continue
+            self.pool.release(upstream, latency_s=time.perf_counter() - started, ttft_s=ttft)
+            return
+        raise error or RuntimeError(f"No upstream available for '{self.pool.name}'")
@@ -0,0 +1,131 @@
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from schema.audio import SAMPLE_RATE
+
+try:
+    import webrtcvad
+except ImportError:  # optional: fall back to the energy detector
+    webrtcvad = None
+
+
+@dataclass
+class SpeechSegment:
+    """A finished stretch of speech; times are seconds from the start of the stream."""
+
+    audio: np.ndarray
+    start: float
+    end: float
+
+
+@dataclass
+class _OpenSegment:
+    frames: list[np.ndarray] = field(default_factory=list)
+    start_sample: int = 0
+    speech_frames: int = 0
+    trailing_silence: int = 0
+
+
+class VoiceActivitySegmenter:
+    """
+    Cuts a live 16 kHz mono stream into speech segments.
+
+    Audio is examined in fixed frames. Each frame is classified as speech by
+    webrtcvad when it is installed, otherwise by RMS energy. A segment opens on
+    the first speech frame, keeps a short pre-roll so word onsets are not
+    clipped, and closes after `silence_ms` of silence or `max_segment_s` of audio.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = SAMPLE_RATE,
+        frame_ms: int = 30,
+        energy_threshold: float = 0.01,
+        silence_ms: int = 500,
+        max_segment_s: float = 15.0,
+        min_speech_ms: int = 200,
+        preroll_ms: int = 150,
+        vad_aggressiveness: int = 2,
+    ):
+        self.sample_rate = sample_rate
+        self.frame_size = sample_rate * frame_ms // 1000
+        self.energy_threshold = energy_threshold
+        self.silence_frames = max(1, silence_ms // frame_ms)
+        self.max_segment_frames = int(max_segment_s * 1000 // frame_ms)
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.preroll_frames = preroll_ms // frame_ms
+        self._vad = webrtcvad.Vad(vad_aggressiveness) if webrtcvad is not None else None
+        self._remainder = np.zeros(0, dtype=np.float32)
+        self._preroll: list[np.ndarray] = []
+        self._segment: _OpenSegment | None = None
+        self._samples_seen = 0
+
+    def _is_speech(self, frame: np.ndarray) -> bool:
+        if self._vad is not None:
+            pcm = (np.clip(frame, -1.0, 1.0) * 32767).astype(np.int16).tobytes()
+            return self._vad.is_speech(pcm, self.sample_rate)
+        return float(np.sqrt(np.mean(frame ** 2))) > self.energy_threshold
+
+    def push(self, samples: np.ndarray) -> list[SpeechSegment]:
+        """
+        Feed newly captured samples.
+        :return: Segments that were closed by this chunk, in order.
+        """
+        finished: list[SpeechSegment] = []
+        buffer = np.concatenate([self._remainder, samples.astype(np.float32, copy=False)])
+        n_frames = len(buffer) // self.frame_size
+        for i in range(n_frames):
+            frame = buffer[i * self.frame_size:(i + 1) * self.frame_size]
+            frame_start = self._samples_seen
+            self._samples_seen += self.frame_size
+            speech = self._is_speech(frame)
+
+            if self._segment is None:
+                if speech:
+                    preroll_samples = sum(len(f) for f in self._preroll)
+                    self._segment = _OpenSegment(
+                        frames=[*self._preroll, frame], start_sample=frame_start - preroll_samples, speech_frames=1
+                    )
+                    self._preroll = []
+                else:
+                    self._preroll = (self._preroll + [frame])[-self.preroll_frames:] if self.preroll_frames else []
+                continue
+
+            segment = self._segment
+            segment.frames.append(frame)
+            if speech:
+                segment.speech_frames += 1
+                segment.trailing_silence = 0
+            else:
+                segment.trailing_silence += 1
+
+            if segment.trailing_silence >= self.silence_frames or len(segment.frames) >= self.max_segment_frames:
+                if (closed := self._close()) is not None:
+                    finished.append(closed)
+
+        self._remainder = buffer[n_frames * self.frame_size:].copy()
+        return finished
+
+    def flush(self) -> list[SpeechSegment]:
+        """Close the open segment at end of stream."""
+        if self._segment is not None and len(self._remainder):
+            self._segment.frames.append(self._remainder)
+            self._samples_seen += len(self._remainder)
+        self._remainder = np.zeros(0, dtype=np.float32)
+        closed = self._close()
+        return [closed] if closed is not None else []
+
+    def pending_audio(self) -> np.ndarray | None:
+        """Audio of the segment still being spoken, for partial transcripts."""
+        if self._segment is None or self._segment.speech_frames < self.min_speech_frames:
+            return None
+        return np.concatenate(self._segment.frames)
+
+    def _close(self) -> SpeechSegment | None:
+        segment, self._segment = self._segment, None
+        if segment is None or segment.speech_frames < self.min_speech_frames:
+            return None
+        audio = np.concatenate(segment.frames)
+        start = max(segment.start_sample, 0) / self.sample_rate
+        return SpeechSegment(audio=audio, start=start, end=start + len(audio) / self.sample_rate)
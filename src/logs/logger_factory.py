@@ -1,29 +1,103 @@
+import atexit
 import os
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
-def get_logger(name: str, filename: str, level=logging.INFO) -> logging.Logger:
-    log_dir = "log_dirs"
-    os.makedirs(log_dir, exist_ok=True)
+LOG_DIR = "log_dirs"
+LOG_FORMAT = "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
 
-    file_path = os.path.join(log_dir, filename)
+# One queue + listener thread per log file; loggers only enqueue records.
+_listeners: dict[str, tuple[QueueHandler, QueueListener]] = {}
+_listeners_lock = threading.Lock()
+
+
+def _queue_handler(file_path: str, fmt: str = LOG_FORMAT, console: bool = True) -> QueueHandler:
+    with _listeners_lock:
+        if file_path not in _listeners:
+            formatter = logging.Formatter(fmt)
+
+            file_handler = RotatingFileHandler(file_path, maxBytes=5_000_000, backupCount=3)
+            file_handler.setFormatter(formatter)
+            handlers: list[logging.Handler] = [file_handler]
+
+            if console:
+                stream_handler = logging.StreamHandler()
+                stream_handler.setFormatter(formatter)
+                handlers.append(stream_handler)
+
+            log_queue: queue.SimpleQueue = queue.SimpleQueue()
+            listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+            listener.start()
+            _listeners[file_path] = (QueueHandler(log_queue), listener)
+        return _listeners[file_path][0]
+
+
+@atexit.register
+def _stop_listeners() -> None:
+    """Flush queued records and stop the listener threads."""
+    with _listeners_lock:
+        for _, listener in _listeners.values():
+            listener.stop()
+        _listeners.clear()
+
+
+def get_logger(
+    name: str, filename: str, level=logging.INFO, fmt: str = LOG_FORMAT, console: bool = True
+) -> logging.Logger:
+    """
+    Logger whose records are written by a background thread.
+
+    Calls only put the record on a queue, so file and console I/O never block
+    the caller (e.g. the event loop). Loggers sharing a file share one handler.
+    Pass arguments %-style (`logger.debug("x=%s", x)`) so disabled levels skip formatting.
+    """
+    os.makedirs(LOG_DIR, exist_ok=True)
+
+    file_path = os.path.join(LOG_DIR, filename)
 
     logger = logging.getLogger(name)
     logger.setLevel(level)
 
     # Tránh lặp log nếu logger đã có handler
     if not logger.handlers:
-        formatter = logging.Formatter(
-            "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
-        )
+        logger.addHandler(_queue_handler(file_path, fmt, console))
 
-        file_handler = RotatingFileHandler(file_path, maxBytes=5_000_000, backupCount=3)
-        file_handler.setFormatter(formatter)
+    return logger
 
-        stream_handler = logging.StreamHandler()
-        stream_handler.setFormatter(formatter)
 
-        logger.addHandler(file_handler)
-        logger.addHandler(stream_handler)
+class SampledLogger:
+    """
+    Rate-limited view of a logger for one hot call site, e.g. per-token logs.
 
-    return logger
+    At most one record per `interval_s` is emitted; the calls in between are
+    only counted and the count is appended to the next emitted record. A
+    disabled level costs one `isEnabledFor` check and no formatting.
+    """
+
+    def __init__(self, logger: logging.Logger, interval_s: float = 1.0):
+        self.logger = logger
+        self.interval_s = interval_s
+        self._next_at = 0.0
+        self._suppressed = 0
+
+    def log(self, level: int, msg: str, *args) -> None:
+        if not self.logger.isEnabledFor(level):
+            return
+        now = time.monotonic()
+        if now < self._next_at:
+            self._suppressed += 1
+            return
+        self._next_at = now + self.interval_s
+        if self._suppressed:
+            msg = f"{msg} (+{self._suppressed} suppressed)"
+            self._suppressed = 0
+        self.logger.log(level, msg, *args)
+
+    def debug(self, msg: str, *args) -> None:
+        self.log(logging.DEBUG, msg, *args)
+
+    def info(self, msg: str, *args) -> None:
+        self.log(logging.INFO, msg, *args)
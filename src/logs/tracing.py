@@ -0,0 +1,162 @@
+import json
+import logging
+import threading
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+from logs.logger_factory import get_logger
+
+# Finished traces, one JSON object per line, written by the logging listener thread.
+_sink = get_logger("traces", "traces.jsonl", fmt="%(message)s", console=False)
+_sink.propagate = False
+
+_trace: ContextVar["Trace | None"] = ContextVar("trace", default=None)
+_parent: ContextVar[str | None] = ContextVar("trace_parent", default=None)
+
+
+@dataclass
+class Span:
+    name: str
+    start: float
+    end: float = 0.0
+    parent_id: str | None = None
+    span_id: str = field(default_factory=lambda: uuid.uuid4().hex[:16])
+    attrs: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end - self.start) * 1000
+
+
+class Trace:
+    """
+    Spans recorded for one request.
+
+    The trace is carried in a context variable, so spans opened anywhere
+    below the request (tasks, and worker threads started with a copied
+    context) land in it. Without an active trace, `span` is a no-op.
+    """
+
+    def __init__(self, name: str, trace_id: str | None = None):
+        self.name = name
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.attrs: dict[str, Any] = {}
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.end = 0.0
+        self.spans: list[Span] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def server_timing(self) -> str:
+        """
+        Spans finished so far as a Server-Timing header value, durations summed per name.
+        For a streaming response this only covers the stages before the first byte.
+        """
+        with self._lock:
+            spans = list(self.spans)
+        totals: dict[str, float] = {}
+        for s in spans:
+            totals[s.name] = totals.get(s.name, 0.0) + s.duration_ms
+        total = ((self.end or time.perf_counter()) - self.start) * 1000
+        parts = [f"{name};dur={ms:.1f}" for name, ms in totals.items()]
+        return ", ".join([f"total;dur={total:.1f}", *parts])
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            spans = list(self.spans)
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_ms": round((self.end - self.start) * 1000, 3),
+            "attrs": self.attrs,
+            "spans": [
+                {
+                    "name": s.name,
+                    "span_id": s.span_id,
+                    "parent_id": s.parent_id,
+                    "offset_ms": round((s.start - self.start) * 1000, 3),
+                    "duration_ms": round(s.duration_ms, 3),
+                    "attrs": s.attrs,
+                }
+                for s in sorted(spans, key=lambda s: s.start)
+            ],
+        }
+
+
+def start_trace(name: str, trace_id: str | None = None) -> Trace:
+    trace = Trace(name, trace_id)
+    _trace.set(trace)
+    _parent.set(None)
+    return trace
+
+
+def end_trace(trace: Trace) -> None:
+    """Close a trace and write it to the JSON-lines sink (log_dirs/traces.jsonl)."""
+    if trace.end:
+        return
+    trace.end = time.perf_counter()
+    if _sink.isEnabledFor(logging.INFO):
+        _sink.info(json.dumps(trace.to_dict(), default=str))
+
+
+def current_trace() -> Trace | None:
+    return _trace.get()
+
+
+def set_attribute(key: str, value: Any) -> None:
+    if (trace := _trace.get()) is not None:
+        trace.attrs[key] = value
+
+
+@contextmanager
+def span(name: str, **attrs) -> Iterator[Span | None]:
+    """
+    Time a block as a child of the current span.
+
+    Open and close it within one task; around `yield` in an async generator
+    use `record` instead, since each step may run in a different context.
+    """
+    trace = _trace.get()
+    if trace is None:
+        yield None
+        return
+    s = Span(name=name, start=time.perf_counter(), parent_id=_parent.get(), attrs=attrs)
+    token = _parent.set(s.span_id)
+    try:
+        yield s
+    finally:
+        s.end = time.perf_counter()
+        _parent.reset(token)
+        trace.add(s)
+
+
+def record(name: str, start: float, end: float, trace: Trace | None = None, **attrs) -> None:
+    """Add an already measured span (perf_counter timestamps) to `trace` or the current trace."""
+    trace = trace or _trace.get()
+    if trace is not None:
+        trace.add(Span(name=name, start=start, end=end, parent_id=_parent.get(), attrs=attrs))
+
+
+@contextmanager
+def capture() -> Iterator[Trace]:
+    """
+    Collect spans into a detached trace, e.g. for work shared by several
+    requests; copy them into each request's trace afterwards.
+    """
+    trace = Trace("capture")
+    trace_token, parent_token = _trace.set(trace), _parent.set(None)
+    try:
+        yield trace
+    finally:
+        _trace.reset(trace_token)
+        _parent.reset(parent_token)
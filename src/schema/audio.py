@@ -0,0 +1,42 @@
+import subprocess
+
+import numpy as np
+
+from logs import tracing
+
+SAMPLE_RATE = 16000
+
+
+def decode_audio(data: bytes, sr: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Decode an in-memory audio file (wav, webm, mp3, ...) to a mono float32 waveform.
+
+    The bytes are piped through ffmpeg's stdin/stdout, so nothing touches the
+    filesystem and concurrent calls cannot clobber each other's audio.
+    :param data: Encoded audio bytes as uploaded.
+    :param sr: Target sample rate; Whisper expects 16 kHz.
+    :return: float32 array in [-1, 1].
+    """
+    cmd = [
+        "ffmpeg",
+        "-nostdin",
+        "-threads", "0",
+        "-i", "pipe:0",
+        "-f", "s16le",
+        "-ac", "1",
+        "-acodec", "pcm_s16le",
+        "-ar", str(sr),
+        "pipe:1",
+    ]
+    try:
+        with tracing.span("audio.decode", bytes=len(data)):
+            out = subprocess.run(cmd, input=data, capture_output=True, check=True).stdout
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Failed to decode audio: {e.stderr.decode(errors='ignore')}") from e
+
+    return pcm16_to_float32(out)
+
+
+def pcm16_to_float32(pcm: bytes) -> np.ndarray:
+    """Convert little-endian signed 16-bit PCM to a float32 waveform in [-1, 1]."""
+    return np.frombuffer(pcm, np.int16).astype(np.float32) / 32768.0
@@ -7,6 +7,12 @@ class TextRequest(BaseModel):
     tgt_lang: str
     model: str
 
+class TextBatchRequest(BaseModel):
+    segments: list[str]
+    src_lang: str
+    tgt_lang: str
+    model: str
+
 class SpeechRequest(BaseModel):   
     audio: bytes
 
@@ -16,8 +22,21 @@ class BaseModelWrapper:
     Base class for all models.
     """
 
+    model = None
+
     def __load_model__(self):
         raise NotImplementedError("load_model method not implemented.")
+
+    def is_loaded(self) -> bool:
+        return self.model is not None
+
+    def unload(self):
+        """Drop the loaded weights; the next call to __load_model__ reloads them."""
+        self.model = None
+
+    def warmup(self):
+        """Run one small inference so the first real request doesn't pay one-off setup costs."""
+        pass
         
     def generate(self, request: TextRequest):
         
@@ -73,6 +92,21 @@ class ChatHistoryInput(BaseModel):
         description="Thread ID to persist and continue a multi-turn conversation.",
         examples=["847c6285-8fc9-4560-a83f-4e6285809254"],
     )
+    limit: int = Field(
+        description="Maximum number of messages to return, latest first.",
+        default=50,
+        ge=1,
+        le=500,
+    )
+    cursor: int | None = Field(
+        description="`next_cursor` of the previous page, to fetch older messages.",
+        default=None,
+        ge=0,
+    )
 
 class ChatHistory(BaseModel):
-    messages: list[ChatMessage]
\ No newline at end of file
+    messages: list[ChatMessage]
+    next_cursor: int | None = Field(
+        description="Cursor for the next (older) page, or None when the start of the thread is reached.",
+        default=None,
+    )
\ No newline at end of file
@@ -0,0 +1,100 @@
+import importlib.util
+import threading
+from dataclasses import dataclass, field
+
+import httpx
+
+# HTTP/2 is negotiated over TLS only and needs the optional `h2` package.
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+@dataclass
+class PoolStats:
+    """Requests sent vs. TCP connections opened by one pooled client, via httpcore trace events."""
+
+    requests: int = 0
+    connections_opened: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def _on_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def _on_trace(self, event_name: str) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self.connections_opened += 1
+
+    def snapshot(self) -> dict:
+        return {
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "connections_reused": max(self.requests - self.connections_opened, 0),
+        }
+
+
+def _limits(max_connections: int, max_keepalive: int, keepalive_expiry: float) -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive,
+        keepalive_expiry=keepalive_expiry,
+    )
+
+
+def create_client(
+    stats: PoolStats,
+    max_connections: int = 20,
+    max_keepalive: int = 10,
+    keepalive_expiry: float = 30.0,
+    http2: bool = True,
+    timeout: httpx.Timeout | float = 60.0,
+    **kwargs,
+) -> httpx.Client:
+    """
+    Long-lived keep-alive client. Use one per host: `max_connections` is the cap for that host.
+    """
+
+    def trace(event_name: str, info: dict) -> None:
+        stats._on_trace(event_name)
+
+    def on_request(request: httpx.Request) -> None:
+        stats._on_request()
+        request.extensions["trace"] = trace
+
+    return httpx.Client(
+        limits=_limits(max_connections, max_keepalive, keepalive_expiry),
+        http2=http2 and HTTP2_AVAILABLE,
+        timeout=timeout,
+        event_hooks={"request": [on_request]},
+        **kwargs,
+    )
+
+
+def create_async_client(
+    stats: PoolStats,
+    max_connections: int = 20,
+    max_keepalive: int = 10,
+    keepalive_expiry: float = 30.0,
+    http2: bool = True,
+    timeout: httpx.Timeout | float = 60.0,
+    **kwargs,
+) -> httpx.AsyncClient:
+    """
+    Async counterpart of `create_client`. Its connections belong to the event
+    loop it is first used on.
+    """
+
+    async def trace(event_name: str, info: dict) -> None:
+        stats._on_trace(event_name)
+
+    async def on_request(request: httpx.Request) -> None:
+        stats._on_request()
+        request.extensions["trace"] = trace
+
+    return httpx.AsyncClient(
+        limits=_limits(max_connections, max_keepalive, keepalive_expiry),
+        http2=http2 and HTTP2_AVAILABLE,
+        timeout=timeout,
+        event_hooks={"request": [on_request]},
+        **kwargs,
+    )
@@ -1,68 +1,351 @@
 from enum import StrEnum
 from typing import TypeAlias
+from collections.abc import Callable
 import os
-from schema.base import BaseModelWrapper, SpeechRequest, TextRequest
-from transformers import MBart50Tokenizer, MBartForConditionalGeneration
+import json
+import threading
+import torch
+import numpy as np
+from schema.audio import SAMPLE_RATE, decode_audio
+from logs import tracing
+from schema.base import BaseModelWrapper, SpeechRequest, TextBatchRequest, TextRequest
+from transformers import (
+    MBart50Tokenizer, MBartForConditionalGeneration, StoppingCriteria, StoppingCriteriaList, TextStreamer,
+)
 import whisper
-from llama_cpp import Llama
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.messages import AIMessage
 
 
+VOCAB_MAP_FILE = "vocab_map.json"
+# Sentencepiece marker for a token that starts a new word
+SPIECE_UNDERLINE = "▁"
+
+
+class CallbackTextStreamer(TextStreamer):
+    """TextStreamer that hands each decoded text increment to a callback instead of printing it."""
+
+    def __init__(self, tokenizer, on_text: Callable[[str], None], **decode_kwargs):
+        super().__init__(tokenizer, skip_prompt=True, **decode_kwargs)
+        self.on_text = on_text
+
+    def on_finalized_text(self, text: str, stream_end: bool = False):
+        if text:
+            self.on_text(text)
+
+
+class EventStoppingCriteria(StoppingCriteria):
+    """Ends generation at the next decoding step once `event` is set, e.g. when a stream's client is gone."""
+
+    def __init__(self, event: threading.Event):
+        self.event = event
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> torch.BoolTensor:
+        return torch.full((input_ids.shape[0],), self.event.is_set(), device=input_ids.device, dtype=torch.bool)
+
+
+class PrunedVocabTokenizer:
+    """
+    Wraps the original MBart-50 tokenizer for a reduced-vocabulary model
+    (see `python -m tools.prune_vocab`).
+
+    Text is tokenized with the full sentencepiece model, then token ids are
+    remapped to the pruned id space; generated ids are mapped back before
+    decoding. Tokens outside the kept vocabulary map to <unk>.
+    """
+    def __init__(self, tokenizer: MBart50Tokenizer, kept_ids: list[int]):
+        self.tokenizer = tokenizer
+        self.kept_ids = torch.tensor(kept_ids, dtype=torch.long)
+        self.old_to_new = torch.full((len(tokenizer),), kept_ids.index(tokenizer.unk_token_id), dtype=torch.long)
+        self.old_to_new[self.kept_ids] = torch.arange(len(kept_ids))
+        kept = set(kept_ids)
+        self.lang_code_to_id = {
+            lang: int(self.old_to_new[old_id])
+            for lang, old_id in tokenizer.lang_code_to_id.items()
+            if old_id in kept
+        }
+
+    @property
+    def src_lang(self) -> str:
+        return self.tokenizer.src_lang
+
+    @src_lang.setter
+    def src_lang(self, lang: str) -> None:
+        self.tokenizer.src_lang = lang
+
+    def __call__(self, text, **kwargs):
+        encoded = self.tokenizer(text, **kwargs)
+        ids = encoded["input_ids"]
+        if isinstance(ids, torch.Tensor):
+            encoded["input_ids"] = self.old_to_new[ids]
+        elif ids and isinstance(ids[0], list):
+            encoded["input_ids"] = [self.old_to_new[row].tolist() for row in ids]
+        else:
+            encoded["input_ids"] = self.old_to_new[ids].tolist()
+        return encoded
+
+    def _to_original(self, ids):
+        return self.kept_ids[torch.as_tensor(ids, dtype=torch.long)]
+
+    def decode(self, ids, **kwargs) -> str:
+        return self.tokenizer.decode(self._to_original(ids), **kwargs)
+
+    def batch_decode(self, sequences, **kwargs) -> list[str]:
+        return self.tokenizer.batch_decode(self._to_original(sequences), **kwargs)
+
+    def __getattr__(self, name):
+        if name == "tokenizer":
+            raise AttributeError(name)
+        return getattr(self.tokenizer, name)
+
+
 class TextModel(BaseModelWrapper):
     """
     Text model class that inherits from BaseModelWrapper.
     This class is used to load and manage text models.
     """
-    def __init__(self):  
+    def __init__(self, model_path: str | None = None):  
         super().__init__()
         self.model_name = "facebook/mbart-large-50-many-to-many-mmt"
+        # Local checkpoint to load instead of the hub model, e.g. a reduced-vocabulary build.
+        self.model_path = model_path
         self.model = None
         self.tokenizer = None
+        # The tokenizer's src_lang is shared mutable state; guard it when several workers translate.
+        self._tokenizer_lock = threading.Lock()
 
     def __str__(self):
+        if self.model_path:
+            return f"Text Model Name: {self.model_name} ({self.model_path})"
         return f"Text Model Name: {self.model_name}"
     
     def __load_model__(self):
         if self.model is None or self.tokenizer is None:
-            self.model = MBartForConditionalGeneration.from_pretrained(self.model_name, use_safetensors=True)
-            self.tokenizer = MBart50Tokenizer.from_pretrained(self.model_name)
+            with self._tokenizer_lock:
+                if self.model is None or self.tokenizer is None:
+                    source = self.model_path or self.model_name
+                    self.model = MBartForConditionalGeneration.from_pretrained(source, use_safetensors=True)
+                    tokenizer = MBart50Tokenizer.from_pretrained(source)
+                    vocab_map = os.path.join(source, VOCAB_MAP_FILE)
+                    if os.path.isfile(vocab_map):
+                        with open(vocab_map, encoding="utf-8") as f:
+                            tokenizer = PrunedVocabTokenizer(tokenizer, json.load(f)["kept_ids"])
+                        print(f"✂️ Using pruned vocabulary ({len(tokenizer.kept_ids)} tokens).")
+                    self.tokenizer = tokenizer
+                    print(f"✅ Model loaded.")
 
-        print(f"✅ Model loaded.")
         return self.model, self.tokenizer
     
+    def resolve_lang_code(self, language: str) -> str | None:
+        """
+        Map an ISO 639-1 code as reported by Whisper (e.g. "vi") to an MBart-50 code (e.g. "vi_VN").
+        """
+        _, tokenizer = self.__load_model__()
+        if language in tokenizer.lang_code_to_id:
+            return language
+        return next((code for code in tokenizer.lang_code_to_id if code.split("_")[0] == language), None)
+
+    def count_tokens(self, text: str, src_lang: str | None = None) -> int:
+        _, tokenizer = self.__load_model__()
+        with self._tokenizer_lock:
+            if src_lang:
+                tokenizer.src_lang = src_lang
+            return len(tokenizer(text, add_special_tokens=False)["input_ids"])
+
+    def split_long(self, text: str, max_tokens: int) -> list[str]:
+        """
+        Cut text into pieces of at most `max_tokens` tokens, tokenizing it once.
+        Cuts fall before a word-initial token where one is in reach, so words
+        stay whole; text without spaces (e.g. Chinese, Thai) is cut between tokens.
+        :param text: One oversize sentence.
+        :param max_tokens: Token budget per piece.
+        :return: The pieces, in order.
+        """
+        _, tokenizer = self.__load_model__()
+        tokens = tokenizer.tokenize(text)
+        pieces: list[str] = []
+        start = 0
+        while start < len(tokens):
+            # A piece cut mid-word gains a word-initial marker token when it is tokenized again
+            budget = max_tokens if tokens[start].startswith(SPIECE_UNDERLINE) else max_tokens - 1
+            end = min(start + max(budget, 1), len(tokens))
+            if end < len(tokens):
+                end = next((i for i in range(end, start, -1) if tokens[i].startswith(SPIECE_UNDERLINE)), end)
+            if piece := tokenizer.convert_tokens_to_string(tokens[start:end]).strip():
+                pieces.append(piece)
+            start = end
+        return pieces
+
     def generate(self, request: TextRequest):
         """
         Generate text based on the input request.
         :param request: TextRequest object containing the input text and languages.
         :return: Generated text.
         """
+        return self.generate_batch([request])[0]
+
+    def generate_batch(self, requests: list[TextRequest]) -> list[dict]:
+        """
+        Translate several requests sharing the same language pair in one padded forward pass.
+        :param requests: TextRequest objects with identical src_lang / tgt_lang.
+        :return: One result dict per request, in input order.
+        """
         model, tokenizer = self.__load_model__()
         if not model or not tokenizer:
             raise ValueError("❌ Model or tokenizer not loaded.")
-       
+
+        src_lang, tgt_lang = requests[0].src_lang, requests[0].tgt_lang
+        if any(r.src_lang != src_lang or r.tgt_lang != tgt_lang for r in requests):
+            raise ValueError("❌ All requests in a batch must share the same language pair.")
+
+        if src_lang not in tokenizer.lang_code_to_id or tgt_lang not in tokenizer.lang_code_to_id:
+            return [{"error": "Unsupported language code."} for _ in requests]
+
+        try:
+            with self._tokenizer_lock, tracing.span("tokenize"):
+                tokenizer.src_lang = src_lang
+                inputs = tokenizer([r.text for r in requests], return_tensors="pt", padding=True)
+            with tracing.span("decode_loop"):
+                outputs = model.generate(**inputs, forced_bos_token_id=tokenizer.lang_code_to_id[tgt_lang])
+            with tracing.span("detokenize"):
+                generated_texts = tokenizer.batch_decode(outputs, skip_special_tokens=True)
+            return [{"text": text} for text in generated_texts]
+        except Exception as e:
+            return [{"error": str(e)} for _ in requests]
+
+    def generate_stream(
+        self, request: TextRequest, on_text: Callable[[str], None], stop: threading.Event | None = None
+    ) -> dict:
+        """
+        Translate one request, passing decoded text increments to `on_text`
+        as the decoder produces them. Blocking; run it on a worker thread.
+        :param request: TextRequest object containing the input text and languages.
+        :param on_text: Called with each new piece of translated text.
+        :param stop: When set (from any thread), decoding ends after the current step.
+        :return: The full result dict, as returned by generate.
+        """
+        model, tokenizer = self.__load_model__()
         if request.src_lang not in tokenizer.lang_code_to_id or request.tgt_lang not in tokenizer.lang_code_to_id:
             return {"error": "Unsupported language code."}
-    
+
+        pieces: list[str] = []
+
+        def collect(text: str) -> None:
+            pieces.append(text)
+            on_text(text)
+
         try:
-            tokenizer.src_lang = request.src_lang
-            inputs = tokenizer(request.text, return_tensors="pt")
-            outputs = model.generate(**inputs, forced_bos_token_id=tokenizer.lang_code_to_id[request.tgt_lang])
-            generated_text = tokenizer.batch_decode(outputs, skip_special_tokens=True)[0]
-            return {"text": generated_text}
+            with self._tokenizer_lock, tracing.span("tokenize"):
+                tokenizer.src_lang = request.src_lang
+                inputs = tokenizer(request.text, return_tensors="pt")
+            streamer = CallbackTextStreamer(tokenizer, collect, skip_special_tokens=True)
+            with tracing.span("decode_loop", streaming=True):
+                model.generate(
+                    **inputs,
+                    forced_bos_token_id=tokenizer.lang_code_to_id[request.tgt_lang],
+                    streamer=streamer,
+                    stopping_criteria=StoppingCriteriaList([EventStoppingCriteria(stop)]) if stop else None,
+                )
+            return {"text": "".join(pieces).strip()}
         except Exception as e:
             return {"error": str(e)}
+
+    def generate_bucketed(self, request: TextBatchRequest, bucket_size: int = 32) -> list[dict]:
+        """
+        Translate many segments by sorting them on token length into buckets,
+        so each padded batch holds sequences of similar length.
+        :param request: TextBatchRequest with the segments and language pair.
+        :param bucket_size: Maximum number of segments per generate call.
+        :return: One result dict per segment, in input order.
+        """
+        _, tokenizer = self.__load_model__()
+        with self._tokenizer_lock:
+            tokenizer.src_lang = request.src_lang
+            lengths = [len(ids) for ids in tokenizer(request.segments, add_special_tokens=False)["input_ids"]]
+        order = sorted(range(len(request.segments)), key=lengths.__getitem__)
+
+        results: list[dict | None] = [None] * len(request.segments)
+        for start in range(0, len(order), bucket_size):
+            bucket = order[start:start + bucket_size]
+            outputs = self.generate_batch([
+                TextRequest(text=request.segments[i], src_lang=request.src_lang,
+                            tgt_lang=request.tgt_lang, model=request.model)
+                for i in bucket
+            ])
+            for i, output in zip(bucket, outputs):
+                results[i] = output
+        return results
+
+    def unload(self):
+        with self._tokenizer_lock:
+            self.model = None
+            self.tokenizer = None
+
+    def warmup(self):
+        self.generate(TextRequest(text="Hello world.", src_lang="en_XX", tgt_lang="vi_VN", model=self.model_name))
         
 
+class OnnxTextModel(TextModel):
+    """
+    MBart translator backed by ONNX Runtime on CPU.
+
+    Loads an exported encoder / decoder / decoder-with-past graph set with int8
+    dynamic quantization (see `python -m tools.export_onnx`). Decoding reuses the
+    KV cache through the decoder-with-past graph. Same `generate(TextRequest)`
+    interface as TextModel.
+    """
+    ENCODER_FILE = "encoder_model_quantized.onnx"
+    DECODER_FILE = "decoder_model_quantized.onnx"
+    DECODER_WITH_PAST_FILE = "decoder_with_past_model_quantized.onnx"
+
+    def __init__(self, model_dir: str, num_threads: int | None = None):
+        super().__init__()
+        self.model_dir = model_dir
+        self.num_threads = num_threads
+
+    def __str__(self):
+        return f"Text Model Name: {self.model_name} (ONNX int8, {self.model_dir})"
+
+    def __load_model__(self):
+        if self.model is None or self.tokenizer is None:
+            with self._tokenizer_lock:
+                if self.model is None or self.tokenizer is None:
+                    if not os.path.isdir(self.model_dir):
+                        raise FileNotFoundError(
+                            f"❌ ONNX model not found at {self.model_dir}. Run `python -m tools.export_onnx` first."
+                        )
+                    import onnxruntime
+                    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+                    session_options = onnxruntime.SessionOptions()
+                    if self.num_threads:
+                        session_options.intra_op_num_threads = self.num_threads
+                    self.model = ORTModelForSeq2SeqLM.from_pretrained(
+                        self.model_dir,
+                        encoder_file_name=self.ENCODER_FILE,
+                        decoder_file_name=self.DECODER_FILE,
+                        decoder_with_past_file_name=self.DECODER_WITH_PAST_FILE,
+                        use_cache=True,
+                        use_merged=False,
+                        provider="CPUExecutionProvider",
+                        session_options=session_options,
+                    )
+                    self.tokenizer = MBart50Tokenizer.from_pretrained(self.model_dir)
+                    print(f"✅ ONNX model loaded.")
+
+        return self.model, self.tokenizer
+
+
 class SpeechModel(BaseModelWrapper):
     """
     Speech model class that inherits from BaseModelWrapper.
     This class is used to load and manage speech models.
     """
-    def __init__(self):
+    def __init__(self, model_name: str = "base"):
         super().__init__()
-        self.model_name = "base"#"openai/whisper-large-v3-turbo" 
-        self.model = whisper.load_model(self.model_name) 
+        self.model_name = model_name #"openai/whisper-large-v3-turbo" 
+        self.model = None
+        self._load_lock = threading.Lock()
 
     def __str__(self):
         return f"Speech Model Name: {self.model_name}"
@@ -76,10 +359,16 @@ class SpeechModel(BaseModelWrapper):
         #                     generate_kwargs={"language": language,
         #                                      "task": task,},
         #                     device=0)
-        pipeline_whisper = whisper.load_model(self.model_name)
+        if self.model is None:
+            with self._load_lock:
+                if self.model is None:
+                    self.model = whisper.load_model(self.model_name)
+                    print(f"✅ Model loaded.")
 
-        print(f"✅ Model loaded.")
-        return pipeline_whisper
+        return self.model
+
+    def warmup(self):
+        self.transcribe(np.zeros(16000, dtype=np.float32))
     
     def generate(self, request: SpeechRequest):
         """
@@ -88,17 +377,53 @@ class SpeechModel(BaseModelWrapper):
         :return: Generated speech.
         """
         
-        if not self.model:
+        model = self.__load_model__()
+        if not model:
             raise ValueError("❌ Model not loaded.")
         
         try:    
-            with open("temp.wav", "wb") as f:
-                f.write(request.audio)
-            result = self.model.transcribe("temp.wav")
-            os.remove("temp.wav")
+            audio = decode_audio(request.audio)
+            result = model.transcribe(audio)
             return {"text": result["text"]}
         except Exception as e:
             return {"error": str(e)}
+
+    def transcribe(self, audio: np.ndarray, **options) -> dict:
+        """
+        Transcribe an already decoded 16 kHz float32 waveform.
+        :param audio: Mono waveform, e.g. a speech segment from a live stream.
+        :param options: Extra whisper transcribe options (language, task, ...).
+        :return: Whisper's result dict (text, segments, language).
+        """
+        model = self.__load_model__()
+        if not model:
+            raise ValueError("❌ Model not loaded.")
+        with tracing.span("transcribe", audio_s=round(len(audio) / SAMPLE_RATE, 2)):
+            return model.transcribe(audio, condition_on_previous_text=False, **options)
+
+    def transcribe_batch(self, audios: list[np.ndarray]) -> list[dict]:
+        """
+        Transcribe several clips of up to 30 s in one pass: their log-mel
+        spectrograms are stacked, encoded as one batch and decoded together.
+        :param audios: Mono 16 kHz float32 waveforms.
+        :return: One {"text", "language"} dict per clip, in input order.
+        """
+        model = self.__load_model__()
+        if not model:
+            raise ValueError("❌ Model not loaded.")
+
+        with tracing.span("mel"):
+            mels = torch.stack([
+                whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), model.dims.n_mels)
+                for audio in audios
+            ]).to(model.device)
+        with tracing.span("encode"), torch.no_grad():
+            audio_features = model.embed_audio(mels)
+        # decode() skips the encoder when given features; detokenization happens inside it
+        options = whisper.DecodingOptions(fp16=model.device.type == "cuda", without_timestamps=True)
+        with tracing.span("decode_loop"):
+            results = whisper.decode(model, audio_features, options)
+        return [{"text": result.text.strip(), "language": result.language} for result in results]
         
 
 class LocalvLLMModelName(StrEnum):
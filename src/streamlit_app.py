@@ -10,11 +10,20 @@ import asyncio
 
 from typing import AsyncGenerator
 from schema.base import ChatMessage, ChatHistory
-from logs.logger_factory import get_logger
+from logs.logger_factory import SampledLogger, get_logger
 import traceback
 import base64
 
 logger = get_logger("streamlit", "streamlit.log")
+token_logger = SampledLogger(logger, interval_s=1.0)
+
+AGENT_URL = "http://backend:8000"
+
+
+@st.cache_resource
+def get_agent_client(base_url: str = AGENT_URL) -> AgentClient:
+    """One AgentClient, and so one keep-alive connection pool, shared by all sessions."""
+    return AgentClient(base_url=base_url)
 
 
 def get_or_create_user_id():
@@ -57,10 +66,10 @@ async def main():
             use_streaming = st.toggle("Use Streaming", value=True)
         
         if "agent_client" not in st.session_state:
-            agent_url = "http://backend:8000"
+            agent_url = AGENT_URL
             try:
                 with st.spinner("Connecting to agent service..."):
-                    st.session_state.agent_client = AgentClient(base_url=agent_url)
+                    st.session_state.agent_client = get_agent_client(agent_url)
 
             except AgentClientError as e:
                 tb = traceback.format_exc()
@@ -81,7 +90,7 @@ async def main():
                     messages: ChatHistory = agent_client.get_history(thread_id=thread_id).messages
                     logger.info(f"📜 Loaded history for thread_id={thread_id} with {len(messages)} messages")
 
-                except AgentClientError:
+                except AgentClientError as e:
                     tb = traceback.format_exc()
                     logger.warning(f"⚠️ No message history for thread_id={thread_id}: {e}\n{tb}")
                     st.error("No message history found for this Thread ID.")
@@ -256,26 +265,29 @@ async def main():
                 st.write(msg.content)
 
             try:
-                # Call the backend API for translation
-                response = requests.post(
-                    "http://backend:8000/speech2text/text",
-                    json={"text": user_input, "src_lang": src_lang, "tgt_lang": tgt_lang, "model": model},
-                )
-
-                data = response.json()
-                if response.status_code == 200 and "text" in data:                   
-                    st.session_state.messages.append(ChatMessage(type="ai", content=data["text"]))
-                    msg = ChatMessage(type="ai", content=data["text"])
-                    with st.chat_message(msg.type):
-                        st.write(msg.content)
-
+                # Stream the translation from the backend, rendering it as it is decoded
+                translation_client = get_agent_client()
+                translated = ""
+                error = None
+                with st.chat_message("ai"):
+                    placeholder = st.empty()
+                    async for part in translation_client.astream_translation(
+                        text=user_input, src_lang=src_lang, tgt_lang=tgt_lang, model=model
+                    ):
+                        if isinstance(part, ChatMessage):
+                            error = part.content
+                            break
+                        translated += part
+                        placeholder.write(translated)
+
+                if error:
+                    logger.error(f"❌ Translation error: {error}")
+                    st.error(f"❌ {error}")
                 else:
-                    st.write(data["error"])
-                    logger.error(f"❌ Translation error: {data.get('error')}")
-                    st.error(f"❌ Error: {response.json()}")
-                
+                    st.session_state.messages.append(ChatMessage(type="ai", content=translated.strip()))
+
                 # st.rerun()
-            except requests.exceptions.RequestException as e:
+            except Exception as e:
                 tb = traceback.format_exc()
                 logger.error(f"🌐 Translation request failed: {e}\n{tb}")
                 st.error(f"❌ Error: {e}")
@@ -315,7 +327,7 @@ async def draw_streaming_response(
             continue  # Skip empty or None tokens
         
         # str message represents an intermediate token being streamed
-        logger.info(f"📥 Received stream token: {msg}")
+        token_logger.debug("📥 Received stream token: %r", msg)
         if isinstance(msg, str):
             # If placeholder is empty, this is the first token of a new message
             # being streamed. We need to do setup.
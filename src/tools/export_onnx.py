@@ -0,0 +1,97 @@
+"""
+Export the MBart-50 translator to ONNX, apply int8 dynamic quantization and
+check parity against the PyTorch model.
+
+Usage (from src/):
+    python -m tools.export_onnx --output models/mbart-50-onnx-int8
+    python -m tools.export_onnx --output models/mbart-50-onnx-int8 --check-only
+"""
+import argparse
+import difflib
+import sys
+import time
+
+from schema.base import TextRequest
+from schema.models import OnnxTextModel, TextModel
+
+# Fixed sentence set for the parity check: (text, src_lang, tgt_lang)
+PARITY_SENTENCES = [
+    ("Hello, how are you today?", "en_XX", "vi_VN"),
+    ("The weather is nice, let's go for a walk.", "en_XX", "fr_XX"),
+    ("Please restart the application to apply the update.", "en_XX", "de_DE"),
+    ("Where is the nearest train station?", "en_XX", "es_XX"),
+    ("Tôi muốn đặt một bàn cho hai người.", "vi_VN", "en_XX"),
+    ("Je voudrais un café, s'il vous plaît.", "fr_XX", "en_XX"),
+    ("Das Meeting wurde auf morgen verschoben.", "de_DE", "en_XX"),
+    ("Спасибо за вашу помощь.", "ru_RU", "en_XX"),
+]
+
+
+def export(model_name: str, output_dir: str) -> None:
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import MBart50Tokenizer
+
+    print(f"📦 Exporting {model_name} to ONNX ...")
+    ort_model = ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True, use_cache=True, use_merged=False)
+    ort_model.save_pretrained(output_dir)
+    MBart50Tokenizer.from_pretrained(model_name).save_pretrained(output_dir)
+
+    qconfig = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+    for file_name in ("encoder_model.onnx", "decoder_model.onnx", "decoder_with_past_model.onnx"):
+        print(f"⚙️ Quantizing {file_name} (int8 dynamic) ...")
+        quantizer = ORTQuantizer.from_pretrained(output_dir, file_name=file_name)
+        quantizer.quantize(save_dir=output_dir, quantization_config=qconfig)
+    print(f"✅ Quantized ONNX model saved to {output_dir}")
+
+
+def check_parity(output_dir: str, min_similarity: float) -> bool:
+    """
+    Translate PARITY_SENTENCES with both backends and compare outputs.
+    :return: True when every sentence reaches `min_similarity` (character-level ratio).
+    """
+    backends = (("torch", TextModel()), ("onnx", OnnxTextModel(output_dir)))
+    requests = [
+        TextRequest(text=text, src_lang=src_lang, tgt_lang=tgt_lang, model="facebook/Mbart50")
+        for text, src_lang, tgt_lang in PARITY_SENTENCES
+    ]
+    # Warm up both backends so load time is not counted.
+    for _, model in backends:
+        model.generate(requests[0])
+
+    ok = True
+    timings = {"torch": 0.0, "onnx": 0.0}
+    for request in requests:
+        src_lang, tgt_lang = request.src_lang, request.tgt_lang
+        outputs = {}
+        for name, model in backends:
+            started = time.perf_counter()
+            outputs[name] = model.generate(request).get("text", "")
+            timings[name] += time.perf_counter() - started
+
+        similarity = difflib.SequenceMatcher(None, outputs["torch"], outputs["onnx"]).ratio()
+        status = "✅" if similarity >= min_similarity else "❌"
+        ok &= similarity >= min_similarity
+        print(f"{status} [{src_lang}->{tgt_lang}] similarity={similarity:.3f}")
+        print(f"    torch: {outputs['torch']}")
+        print(f"    onnx : {outputs['onnx']}")
+
+    print(f"⏱️ torch {timings['torch']:.2f}s | onnx {timings['onnx']:.2f}s")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=TextModel().model_name)
+    parser.add_argument("--output", default="models/mbart-50-onnx-int8")
+    parser.add_argument("--check-only", action="store_true", help="Skip export, only run the parity check.")
+    parser.add_argument("--min-similarity", type=float, default=0.9)
+    args = parser.parse_args()
+
+    if not args.check_only:
+        export(args.model, args.output)
+    sys.exit(0 if check_parity(args.output, args.min_similarity) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Build a reduced-vocabulary MBart-50 model for the languages we actually serve.
+
+The kept vocabulary is every special token, the language codes of the served
+languages and every token the tokenizer produces on a sample corpus of those
+languages. The shared embedding, the output projection and the final logits
+bias are sliced to the kept rows, so both memory and the per-step softmax shrink.
+Point TEXT_MODEL_PATH at the output directory to serve it.
+
+Usage (from src/):
+    python -m tools.prune_vocab --corpus data/corpus/*.txt --output models/mbart-50-pruned
+Corpus files are plain text, one sentence per line, named <lang_code>.txt
+(e.g. vi_VN.txt) so each is tokenized with the right source language.
+"""
+import argparse
+import json
+import os
+from collections import Counter
+
+import torch
+from transformers import MBart50Tokenizer, MBartForConditionalGeneration
+
+from schema.models import VOCAB_MAP_FILE, TextModel
+
+SERVED_LANGUAGES = ["en_XX", "vi_VN", "fr_XX", "de_DE", "es_XX", "ru_RU", "zh_CN", "ja_XX"]
+
+
+def collect_token_counts(tokenizer: MBart50Tokenizer, corpus_files: list[str]) -> Counter:
+    counts: Counter = Counter()
+    for path in corpus_files:
+        lang = os.path.splitext(os.path.basename(path))[0]
+        if lang in tokenizer.lang_code_to_id:
+            tokenizer.src_lang = lang
+        with open(path, encoding="utf-8") as f:
+            lines = [line.strip() for line in f if line.strip()]
+        for start in range(0, len(lines), 1024):
+            for ids in tokenizer(lines[start:start + 1024], add_special_tokens=False)["input_ids"]:
+                counts.update(ids)
+        print(f"📖 {path}: {len(lines)} lines, {len(counts)} distinct tokens so far")
+    return counts
+
+
+def select_kept_ids(tokenizer: MBart50Tokenizer, languages: list[str], counts: Counter, min_count: int) -> list[int]:
+    kept = set(tokenizer.all_special_ids)
+    kept.update(tokenizer.lang_code_to_id[lang] for lang in languages)
+    kept.update(token_id for token_id, count in counts.items() if count >= min_count)
+    return sorted(kept)
+
+
+def prune_model(model: MBartForConditionalGeneration, kept_ids: list[int]) -> MBartForConditionalGeneration:
+    index = torch.tensor(kept_ids, dtype=torch.long)
+    old_to_new = {old: new for new, old in enumerate(kept_ids)}
+    config = model.config
+
+    # Slice the shared embedding in place so its class (and MBart's embed_scale) is preserved,
+    # then re-point the encoder/decoder embed_tokens and the output projection at it.
+    shared = model.get_input_embeddings()
+    shared.weight = torch.nn.Parameter(shared.weight.data[index].clone())
+    shared.num_embeddings = len(kept_ids)
+    shared.padding_idx = old_to_new[config.pad_token_id]
+    model.set_input_embeddings(shared)
+
+    new_head = torch.nn.Linear(shared.embedding_dim, len(kept_ids), bias=False)
+    new_head.weight = shared.weight
+    model.set_output_embeddings(new_head)
+    model.final_logits_bias = model.final_logits_bias[:, index].clone()
+
+    config.vocab_size = len(kept_ids)
+    for attr in ("pad_token_id", "bos_token_id", "eos_token_id", "decoder_start_token_id", "forced_eos_token_id"):
+        old_id = getattr(config, attr, None)
+        if old_id is not None:
+            setattr(config, attr, old_to_new[old_id])
+    if model.generation_config is not None:
+        for attr in ("pad_token_id", "bos_token_id", "eos_token_id", "decoder_start_token_id", "forced_eos_token_id"):
+            old_id = getattr(model.generation_config, attr, None)
+            if old_id is not None:
+                setattr(model.generation_config, attr, old_to_new[old_id])
+    return model
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=TextModel().model_name)
+    parser.add_argument("--languages", nargs="+", default=SERVED_LANGUAGES)
+    parser.add_argument("--corpus", nargs="+", required=True, help="Corpus files named <lang_code>.txt")
+    parser.add_argument("--min-count", type=int, default=1, help="Drop tokens seen fewer times than this.")
+    parser.add_argument("--output", default="models/mbart-50-pruned")
+    args = parser.parse_args()
+
+    tokenizer = MBart50Tokenizer.from_pretrained(args.model)
+    model = MBartForConditionalGeneration.from_pretrained(args.model, use_safetensors=True)
+    original_params = sum(p.numel() for p in model.parameters())
+
+    counts = collect_token_counts(tokenizer, args.corpus)
+    kept_ids = select_kept_ids(tokenizer, args.languages, counts, args.min_count)
+    print(f"✂️ Keeping {len(kept_ids)} / {len(tokenizer)} tokens")
+
+    model = prune_model(model, kept_ids)
+    pruned_params = sum(p.numel() for p in model.parameters())
+    print(f"📉 Parameters: {original_params / 1e6:.1f}M -> {pruned_params / 1e6:.1f}M")
+
+    os.makedirs(args.output, exist_ok=True)
+    model.save_pretrained(args.output, safe_serialization=True)
+    tokenizer.save_pretrained(args.output)
+    with open(os.path.join(args.output, VOCAB_MAP_FILE), "w", encoding="utf-8") as f:
+        json.dump({"languages": args.languages, "kept_ids": kept_ids}, f)
+    print(f"✅ Pruned model saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()